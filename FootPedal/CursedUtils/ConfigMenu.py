@@ -71,6 +71,17 @@ class ConfigMenu(cu.Window):
             
             Same as the above, except allows for blank entries.
             
+        .isCountOrNone(validate)
+        .isYesNoOrNone(validate)
+        
+            These test for a whole number greater than zero, or for Y/N
+            (or yes/no, in any case), respectively, and allow blank entries.
+            
+        .isYes(value)
+        
+            Not a validator, but a helper for reading what .isYesNoOrNone() 
+            let through.  Returns True for Y or yes, in any case.
+            
         .layout()
         
             uses the provided title and fields to display the options and
@@ -191,6 +202,24 @@ class ConfigMenu(cu.Window):
         else:
             return self.isDir( validate )
     
+    def isCountOrNone(self, validate):
+        
+        if validate == '' or ( validate.isdigit() and int( validate ) > 0 ):
+            return True
+        else:
+            return 'Must be a whole number greater than zero'
+        
+    def isYesNoOrNone(self, validate):
+        
+        if validate.lower() in [ '', 'y', 'n', 'yes', 'no' ]:
+            return True
+        else:
+            return 'Must be Y or N'
+        
+    @staticmethod
+    def isYes(value):
+        return value.lower() in [ 'y', 'yes' ]
+    
     def layout(self):
         
         self.setSlot( 'menutitle', 1, int( self.sizeX / 2 ) - 35, 70, cu.CENTER)
@@ -2,4 +2,5 @@
 MAINCONFIG = './footpedal.conf'
 SHOWCONFIG = './shows.conf'
 QUEUEFILE = './footpedal.queue'
+TVDBCACHE = './tvdb.cache'
 LOGDIR = './'
@@ -10,10 +10,17 @@ from FootPedal.menus.PathConfig import PathConfig
 from FootPedal.menus.HandbrakeConfig import HandbrakeConfig
 from FootPedal.menus.MainMenu import MainMenu
 from lib.CrossThreaders import CrossThreadList
+from lib.PipeSupervisor import PipeSupervisor
+from lib.Awatch import AsyncEngine
+from lib.Manifest import Manifest
+from lib.TVDBCache import TVDBCache
+from lib.ShowPrefetcher import ShowPrefetcher
 from HandBrakeUtils.queueManager import hbQueueManager
+from HandBrakeUtils.journal import QueueJournal
 from HandBrakeUtils.chyron import HandbrakeChyron
+from HandBrakeUtils.inbox import hbInbox
 
-from FootPedal import MAINCONFIG, SHOWCONFIG, LOGDIR, QUEUEFILE
+from FootPedal import MAINCONFIG, SHOWCONFIG, LOGDIR, QUEUEFILE, TVDBCACHE
 
 if __name__ == '__main__':
 
@@ -38,21 +45,74 @@ if __name__ == '__main__':
         config = m.config
         m.close()
     
-    if os.path.isfile( QUEUEFILE ):
-        f = open( QUEUEFILE, 'r' )
-        fileQueue = CrossThreadList( json.load( f ) ) 
-        f.close()
+    # one cache for everybody, warmed up in the background while everything else starts
+    tvdbCache = TVDBCache( TVDBCACHE )
+    prefetcher = ShowPrefetcher( SHOWCONFIG, tvdbCache )
+    
+    journal = QueueJournal( QUEUEFILE )
+    fileQueue = CrossThreadList( journal.pending() )
+        
+    if config['handbrake'].get( 'Parallel Encodes', '' ) == '':
+        workers = 1
     else:
-        fileQueue = CrossThreadList()
+        workers = int( config['handbrake']['Parallel Encodes'] )
+        
+    jsonProgress = cu.ConfigMenu.isYes( config['handbrake'].get( 'JSON Progress', '' ) )
+    
+    tuning = {}
+    
+    if config['handbrake'].get( 'Queue Order', '' ) != '':
+        tuning['policy'] = config['handbrake']['Queue Order'].lower()
+    
+    for key, field in [ ( 'maxLoad', 'Max Other CPU %' ), ( 'minMemory', 'Min Free Memory MB' ), ( 'margin', 'Resume Margin %' ),
+                        ( 'maxWorkers', 'Max Parallel Encodes' ) ]:
+        if config['handbrake'].get( field, '' ) != '':
+            tuning[key] = int( config['handbrake'][field] )
+    
+    if config['paths'].get( 'Backup', '' ) != '':
+        manifest = Manifest( LOGDIR + 'backup.manifest', verify=cu.ConfigMenu.isYes( config['paths'].get( 'Verify Backups', '' ) ) )
+    else:
+        manifest = None
+    
+    # the engine does the supervisor's job too, so there's no need for both
+    if cu.ConfigMenu.isYes( config['handbrake'].get( 'Async Engine', '' ) ):
+        engine = AsyncEngine()
+        supervisor = None
+    elif PipeSupervisor.supported:
+        engine = None
+        supervisor = PipeSupervisor( LOGDIR + 'supervisor.log' )
+    else:
+        engine = None
+        supervisor = None
         
     qm = hbQueueManager(source=config['paths']['Staging'], destination=config['paths']['Outbox'], trash=config['paths']['Trash'], 
                         backup=config['paths']['Backup'], json=config['handbrake']['JSON Config'],  
                         preset=config['handbrake']['Preset'], guiPreset=config['handbrake']['GUI Preset'], params={}, 
                         tmp=config['paths']['Temp'], cli=config['handbrake']['Handbrake CLI'], 
-                        sublang=config['handbrake']['Subtitle Language'], log=LOGDIR, queue=fileQueue)
+                        sublang=config['handbrake']['Subtitle Language'], log=LOGDIR, queue=fileQueue,
+                        workers=workers, jsonProgress=jsonProgress, engine=engine, supervisor=supervisor, journal=journal,
+                        manifest=manifest, **tuning)
+    
+    if cu.ConfigMenu.isYes( config['paths'].get( 'Watch Inbox', '' ) ):
+        inbox = hbInbox( qm, config['paths']['Inbox'], staging=config['paths'].get( 'Staging', '' ) )
+    else:
+        inbox = None
     
     chyron = HandbrakeChyron(ui, qm)
     
-    main = MainMenu( ui, qm, chyron, fileQueue )
+    main = MainMenu( ui, qm, chyron, fileQueue, tvdbCache )
+    
+    ui.close()
+    
+    if inbox is not None:
+        inbox.stop()
+    
+    prefetcher.stop()
+    tvdbCache.close()
+    
+    # let any jobs that are being cancelled finish up before the journal closes
+    qm.t.join()
+    journal.close()
     
-    ui.close()
\ No newline at end of file
+    if engine is not None:
+        engine.stop()
\ No newline at end of file
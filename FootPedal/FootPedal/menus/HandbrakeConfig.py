@@ -5,6 +5,7 @@ Created on Jan 16, 2023
 '''
 
 import CursedUtils as cu
+from HandBrakeUtils.scheduler import POLICIES
 
 class HandbrakeConfig(cu.ConfigMenu):
     '''
@@ -19,4 +20,19 @@ class HandbrakeConfig(cu.ConfigMenu):
         self.addField('Preset', 40, '(Optional) One of the built-in HandPresets' )
         self.addField('GUI Preset', 40, '(Optional) A Preset Created and named using the GUI' )
         self.addField('JSON Config', 75, '(Optional) A JSON file containing Handbrake configuration', self.isFileOrNone )
-        self.addField('Subtitle Language', 40, 'The default language code for subtitle files' )
\ No newline at end of file
+        self.addField('Subtitle Language', 40, 'The default language code for subtitle files' )
+        self.addField('Queue Order', 10, '(Optional) fifo, priority, shortest, or roundrobin (one show at a time)', self.isPolicyOrNone )
+        self.addField('Parallel Encodes', 3, 'How many files may be converted at the same time (default 1)', self.isCountOrNone )
+        self.addField('Max Parallel Encodes', 3, '(Optional) If more than the above, find the fastest number up to this', self.isCountOrNone )
+        self.addField('JSON Progress', 3, '(Optional) Y to read progress from HandBrakeCLI\'s JSON output', self.isYesNoOrNone )
+        self.addField('Async Engine', 3, '(Optional) Y to watch every encode from one asyncio event loop', self.isYesNoOrNone )
+        self.addField('Max Other CPU %', 3, '(Optional) Pause encoding when other programs use more of the CPU than this', self.isCountOrNone )
+        self.addField('Min Free Memory MB', 6, '(Optional) Pause encoding when less memory than this is free', self.isCountOrNone )
+        self.addField('Resume Margin %', 3, 'How far under the limits things must get before encoding resumes (default 25)', self.isCountOrNone )
+        
+    def isPolicyOrNone(self, validate):
+        
+        if validate == '' or validate.lower() in POLICIES:
+            return True
+        else:
+            return 'Must be one of ' + ', '.join( POLICIES )
\ No newline at end of file
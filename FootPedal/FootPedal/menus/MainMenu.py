@@ -16,10 +16,13 @@ class MainMenu(object):
     '''
 
 
-    def __init__(self, window:cu.Screen, qm:hbQueueManager, chyron:HandbrakeChyron, config:dict ):
+    def __init__(self, window:cu.Screen, qm:hbQueueManager, chyron:HandbrakeChyron, config:dict, tvdbCache=None ):
         '''
         Constructor
+        
+        tvdbCache is the lib.TVDBCache to hand on to the show menus
         '''
+        self.tvdbCache = tvdbCache
         self.window = window
         self.qm = qm
         self.fileQueue = qm.queue
@@ -67,7 +70,7 @@ class MainMenu(object):
         
     def openShowMenu(self):
         self.chyron.deactivate()
-        x = menu.ShowMenu(self.window)
+        x = menu.ShowMenu(self.window, self.tvdbCache)
         x.close()
         self.chyron.activate()
         
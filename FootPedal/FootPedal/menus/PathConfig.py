@@ -15,8 +15,10 @@ class PathConfig(cu.ConfigMenu):
         self.title = 'Folder Preferences'
         self.configKey='paths'
         self.addField('Inbox', 75, 'This application will check this folder for new files and subtitles.', self.isDir )
+        self.addField('Watch Inbox', 3, 'Optional.  Y to queue files as soon as they arrive in the Inbox.', self.isYesNoOrNone )
         self.addField('Staging', 75, 'Optional.  If set, files will be moved here pending processing.', self.isDir )
         self.addField('Outbox', 75, 'The default location for converted files.', self.isDir )
         self.addField('Trash', 75, 'Optional.  If set, original files will be moved here after conversion.', self.isDir )
         self.addField('Temp', 75, 'This folder is used for processing.', self.isDir )
-        self.addField('Backup', 75, 'Optional.  If set, a second copy of the converted file will be placed here.', self.isDir )
\ No newline at end of file
+        self.addField('Backup', 75, 'Optional.  If set, a second copy of the converted file will be placed here.', self.isDir )
+        self.addField('Verify Backups', 3, 'Optional.  Y to read each backup back and check it against its checksum.', self.isYesNoOrNone )
\ No newline at end of file
@@ -17,11 +17,13 @@ class ShowEdit(cu.ConfigMenu):
     provided, the user will be prompted to set up the profile
     for the first time, either manually or with a TVDB id.
     
-    
+    It also takes the lib.TVDBCache that TVDB lookups should use, if
+    there is one.
     '''
     
-    def __init__(self, parent:cu.Screen, show=None):
+    def __init__(self, parent:cu.Screen, show=None, tvdbCache=None):
         self.show = show
+        self.tvdbCache = tvdbCache
         cu.ConfigMenu.__init__(self, parent, configFile=SHOWCONFIG)
     
     def setup(self):
@@ -127,7 +129,7 @@ class ShowEdit(cu.ConfigMenu):
             
             if r.isdigit():
                 # run TVDB profile check
-                show = TVShow( int(r), self.config['API Key'], self.config['PIN'] )
+                show = TVShow( int(r), self.config['API Key'], self.config['PIN'], cache=self.tvdbCache )
                 
                 if show.name == False:
                     self.slotWrite( 'response1', 'Invalid Id number.')
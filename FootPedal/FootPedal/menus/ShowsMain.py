@@ -13,8 +13,9 @@ class ShowMenu(cu.Window):
     '''
     classdocs
     '''
-    def __init__(self, parent:cu.Screen):
+    def __init__(self, parent:cu.Screen, tvdbCache=None):
         self.configFile = SHOWCONFIG
+        self.tvdbCache = tvdbCache
         self.loadConfig()
         self.keys = cu.KeyResponder()
         cu.Window.__init__(self, parent)
@@ -153,12 +154,12 @@ class ShowMenu(cu.Window):
         
         
     def editShow(self, showname):
-        x =  menu.ShowEdit( self, showname )
+        x =  menu.ShowEdit( self, showname, self.tvdbCache )
         x.close()
         self.setupListMenu()
     
     def addShow(self):
-        x = menu.ShowEdit( self )
+        x = menu.ShowEdit( self, tvdbCache=self.tvdbCache )
         x.close()
         self.setupListMenu()
         
@@ -1,3 +1,7 @@
-from HandBrakeUtils.process import hbProcess
+from HandBrakeUtils.process import hbProcess, hbAsyncProcess
+from HandBrakeUtils.job import hbJob
+from HandBrakeUtils.journal import QueueJournal
+from HandBrakeUtils.scheduler import hbScheduler
 from HandBrakeUtils.queueManager import hbQueueManager
+from HandBrakeUtils.inbox import hbInbox
 from HandBrakeUtils.chyron import HandbrakeChyron
\ No newline at end of file
@@ -23,6 +23,9 @@ class HandbrakeChyron(object):
         self.hqm = hqm
         self.active = True
         
+        # the versions of everything on screen when it was last drawn
+        self.shown = None
+        
         
         y = window.sizeY - 4
         maxX = window.sizeX - 2
@@ -43,6 +46,8 @@ class HandbrakeChyron(object):
         self.active = False
         
     def activate(self):
+        # whatever was in the way has probably drawn over us
+        self.shown = None
         self.active = True
     
     def debug(self, debug):
@@ -58,10 +63,46 @@ class HandbrakeChyron(object):
                 sleep( 0.125 )
                 continue
             
+            # there's only room to show one file in detail, so 
+            # we show the first worker that has one
+            
+            worker = self.hqm.activeWorker()
+            
+            # the worker drops its process from its own thread when the job
+            # ends, so it's read once, here, and only the local is used below
+            
+            if worker is None:
+                process = None
+            else:
+                process = worker.process
+            
+            versions = ( self.hqm.runState.version, self.hqm.runReport.version, self.hqm.post.files.version, worker )
+            
+            if worker is not None:
+                versions += ( worker.jobState.version, process and process.data.version )
+            
+            if versions == self.shown:
+                # nothing's changed, so there's nothing to draw
+                self.hqm.runReport.waitChanged( versions[1], 0.125 )
+                continue
+            
+            self.shown = versions
+            
             runState = self.hqm.runState.get()
             runReport = self.hqm.runReport.copy()
             bragstring = str( runReport['done'] ) + ' file(s) completed, ' + str( runReport['err'] ) + ' failed, ' + str( runReport['queued'] ) + ' queued'
             
+            if runReport['running'] > 1:
+                bragstring = str( runReport['running'] ) + ' converting, ' + bragstring
+                
+            filing = self.hqm.post.pending()
+            
+            if filing > 0:
+                bragstring = str( filing ) + ' filing, ' + bragstring
+                
+            if runReport['throttled'] is not None:
+                bragstring = bragstring + ' (Paused, over ' + runReport['throttled'] + ' limit)'
+            
             if runState == qm.WAITING:
                                 
                 self.window.slotWrite( 'hbTitleBar', 'No Files Queued' )
@@ -115,10 +156,20 @@ class HandbrakeChyron(object):
                 self.window.slotWrite( 'hbQueueStatus', bragstring )
                 self.window.refresh()
                 
-            jobState = self.hqm.jobState.get()
+            if process is None:
+                # if nothing is converting, something may still be being filed away
+                filing = self.hqm.post.first()
+                
+                if filing is None:
+                    jobState = qm.WAITING
+                else:
+                    self.window.slotWrite( 'hbTitleBar', filing[0] )
+                    jobState = filing[1]
+            else:
+                jobState = worker.jobState.get()
             
             if jobState == qm.CONVERTING:                
-                jobInfo = self.hqm.process.data.copy()
+                jobInfo = process.data.copy()
                 #TODO Elapsed Time
                 
                 if jobInfo['%'] == '':
@@ -148,23 +199,26 @@ class HandbrakeChyron(object):
                         self.window.slotWrite( 'hbJobETA', jobInfo['eta'] )
                         self.window.refresh()
                                                   
-                    if len( jobInfo['%'] ) == 5 :
-                        jobInfo['%'] = '0' + jobInfo['%']
+                    percent = jobInfo['%']
+                    
+                    if len( percent ) == 5 :
+                        percent = '0' + percent
                         
-                    self.window.slotWrite('hbJob%', jobInfo['%'])
+                    self.window.slotWrite('hbJob%', percent)
                     self.window.refresh()
                         
             elif jobState == qm.SUSPENDED:
-                jobInfo = self.hqm.hbProcess.data.copy()
+                jobInfo = process.data.copy()
                 self.window.slotWrite( 'hbJobStatus', 'Processing Suspended' )
                 self.window.slotWrite( 'hbJobETA', '' )
                 self.window.slotWrite( 'hbQueueStatus', '1 file suspended, ' + bragstring ) 
                 self.window.slotWrite( 'hbJobFPS', '' )
                 
                 if jobInfo['%'] != '':                
-                    if len( jobInfo['%'] ) == 4:
-                        jobInfo['%'] = '0' + jobInfo['%']
-                    self.window.slotWrite('hbJob%', jobInfo['%'])
+                    percent = jobInfo['%']
+                    if len( percent ) == 4:
+                        percent = '0' + percent
+                    self.window.slotWrite('hbJob%', percent)
                 self.window.refresh()
                     
             else:
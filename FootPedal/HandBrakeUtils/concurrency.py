@@ -0,0 +1,189 @@
+'''
+Created on Feb 19, 2023
+
+@author: Cather Steincamp
+'''
+from HandBrakeUtils.governor import CPUMeter
+from lib import CrossThreadItem
+from HandBrakeUtils.states import *
+from threading import Thread, Event
+from time import strftime
+
+class hbConcurrency(object):
+    '''
+    Works out how many files to convert at once.  One 4K encode can keep 
+    the whole machine busy, while ten SD encodes won't, so no fixed number
+    of workers is right for every queue.
+    
+    The controller hill-climbs.  It adds up fpsNow across every running 
+    encode, a few times a window, and at the end of each window compares 
+    the average with the last window's.  If things got better, it takes 
+    another step the same way; if they got worse, it steps back and tries 
+    the other way next.  It won't step up when the CPU is already flat out, 
+    since that can't help.
+    
+    Windows where the encodes aren't all up to speed, where the number 
+    running isn't the limit (not enough jobs, or more left over from 
+    before the limit came down), or where the governor has stepped in,
+    don't count.
+    
+    Lowering the limit doesn't stop anything; the manager just doesn't
+    start new jobs until enough of the running ones have finished.
+    
+        manager
+            the hbQueueManager this belongs to.  The pool of workers
+            is the most that will ever be allowed.
+        start
+            how many to start with
+        window
+            default 60
+            seconds per window.  Long enough for new encodes to settle.
+        samples
+            default 12
+            how many times per window to look
+        tolerance
+            default 5
+            percent change in fps that counts as better or worse
+        ceiling
+            default 95
+            CPU percent at which we stop trying to add more
+            
+    limit is a CrossThreadItem holding the current number of jobs allowed.
+    Every decision is written to concurrency.log, in the manager's log folder.
+    '''
+
+    def __init__(self, manager, start, window=60, samples=12, tolerance=5, ceiling=95):
+        self.manager = manager
+        self.window = window
+        self.samples = samples
+        self.tolerance = tolerance
+        self.ceiling = ceiling
+        
+        self.limit = CrossThreadItem( max( 1, min( start, len( manager.workers ) ) ) )
+        
+        # the last window that counted
+        self.previous = None
+        self.direction = 1
+        
+        self.wakeup = Event()
+        manager.runState.watch( self.wakeup )
+        
+        self.t = Thread( target=self.run, daemon=True )
+        self.t.start()
+        
+    def log(self, message):
+        f = open( self.manager.log + 'concurrency.log', 'a' )
+        f.write( strftime( '%Y-%m-%d %H:%M:%S ' ) + message + '\n' )
+        f.close()
+        
+    def sample(self):
+        '''
+        returns the total fps of all running encodes, or None if 
+        this isn't a fair sample
+        '''
+        manager = self.manager
+        
+        if manager.governor is not None and manager.governor.isThrottled():
+            return None
+        
+        busy = manager.busyWorkers()
+        
+        if len( busy ) != self.limit.get():
+            # not enough work to go around, or the limit has just come
+            # down and there are still more running than it allows
+            return None
+        
+        total = 0.0
+        
+        for worker in busy:
+            
+            process = worker.process
+            
+            if process is None or worker.jobState.get() != CONVERTING:
+                return None
+            
+            try:
+                fps = float( process.data.get( 'fpsNow' ) )
+            except ( TypeError, ValueError ):
+                # still starting up
+                return None
+            
+            total += fps
+            
+        return total
+    
+    def decide(self, limit, fps, cpu):
+        '''
+        returns the new limit and the reason for it
+        '''
+        most = len( self.manager.workers )
+        
+        if self.previous is None:
+            reason = 'first measurement'
+        else:
+            lastLimit, lastFps = self.previous
+            
+            if lastLimit != limit and fps < lastFps * ( 100 - self.tolerance ) / 100:
+                # that step was a mistake.  go back, and try the other way next time
+                self.previous = ( lastLimit, lastFps )
+                self.direction = -1 if limit > lastLimit else 1
+                return lastLimit, 'worse than ' + '{:.1f}'.format( lastFps ) + 'fps at ' + str( lastLimit ) + ', going back'
+            
+            if lastLimit != limit and fps <= lastFps * ( 100 + self.tolerance ) / 100:
+                # no better, and no worse.  fewer jobs is the tie-breaker.
+                if limit > lastLimit:
+                    self.previous = ( lastLimit, lastFps )
+                else:
+                    self.previous = ( limit, fps )
+                self.direction = -1
+                return min( limit, lastLimit ), 'no better than ' + '{:.1f}'.format( lastFps ) + 'fps at ' + str( lastLimit )
+                
+            reason = 'was ' + '{:.1f}'.format( lastFps ) + 'fps at ' + str( lastLimit )
+        
+        self.previous = ( limit, fps )
+        
+        if self.direction > 0 and ( cpu >= self.ceiling or limit >= most ):
+            self.direction = -1
+        elif self.direction < 0 and limit <= 1:
+            self.direction = 1
+            
+        if self.direction > 0 and ( cpu >= self.ceiling or limit >= most ):
+            return limit, reason + ', holding'
+            
+        return limit + self.direction, reason + ', trying ' + str( limit + self.direction )
+        
+    def run(self):
+        
+        # with a starting point of its own, so the governor doesn't disturb it
+        meter = CPUMeter()
+        
+        while True:
+            
+            limit = self.limit.get()
+            readings = []
+            
+            for i in range( 0, self.samples ):
+                
+                self.wakeup.clear()
+                
+                if self.manager.runState.get() == STOPPED:
+                    return
+                
+                self.wakeup.wait( self.window / self.samples )
+                
+                readings.append( self.sample() )
+                
+            cpu = meter.percent()
+            fair = [ fps for fps in readings if fps is not None ]
+            
+            if len( fair ) * 2 < len( readings ):
+                # not enough of the window counted
+                continue
+            
+            fps = sum( fair ) / len( fair )
+            newLimit, reason = self.decide( limit, fps, cpu )
+            
+            self.log( str( limit ) + ' -> ' + str( newLimit ) + ': ' + '{:.1f}'.format( fps ) + 'fps at ' + str( limit ) 
+                      + ', CPU ' + str( round( cpu ) ) + '%, ' + reason )
+            
+            self.limit.set( newLimit )
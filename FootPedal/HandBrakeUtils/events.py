@@ -0,0 +1,40 @@
+'''
+Created on Feb 24, 2023
+
+@author: Cather Steincamp
+
+The kinds of event hbQueueManager publishes on its EventBus (events).  
+Every event's data has the items listed.
+
+    QUEUED          job
+        The job has been added to the queue.
+    REORDERED       job, index, offset
+        The job has been moved up or down the queue with moveJob().
+    STARTED         job, worker
+        A worker has started converting the job.
+    PROGRESS        job, worker, report
+        HandBrakeCLI has reported progress.  report is what was parsed
+        out of its output (see hbProcess).  These are the only lossy
+        events: a subscriber that falls behind only misses some of them.
+    CONVERTED       job, worker
+        HandBrakeCLI has finished with the job, and it's been handed 
+        to the post-processor.
+    MOVED           job
+        The converted file has been moved to its destination.
+    BACKEDUP        job
+        The converted file has been backed up.
+    FINISHED        job
+        The job is done, and everything has been cleaned up.
+    FAILED          job, error
+        The job failed, in HandBrakeCLI or afterwards.  error is a 
+        description of what went wrong.
+    RUNSTATE        state, previous
+        The queue's runState has changed.  These are only published by
+        the manager's own thread, so a change that's undone before it
+        gets a look in may never be published.
+'''
+
+QUEUED, REORDERED, STARTED, PROGRESS, CONVERTED = 'queued', 'reordered', 'started', 'progress', 'converted'
+MOVED, BACKEDUP, FINISHED, FAILED, RUNSTATE = 'moved', 'backedup', 'finished', 'failed', 'runstate'
+
+LOSSY = [ PROGRESS ]
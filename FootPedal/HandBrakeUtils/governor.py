@@ -0,0 +1,195 @@
+'''
+Created on Feb 18, 2023
+
+@author: Cather Steincamp
+'''
+import psutil
+from lib import CrossThreadItem
+from HandBrakeUtils.states import *
+from threading import Thread, Event
+
+class CPUMeter(object):
+    '''
+    The share of the whole machine's CPU that's been busy since the last
+    time percent() was called, like psutil.cpu_percent(), but worked out 
+    from psutil.cpu_times() with a starting point of its own.  
+    psutil.cpu_percent() only has the one, so everyone who calls it 
+    resets it for everyone else.
+    '''
+    
+    def __init__(self):
+        self.last = self.times()
+        
+    def times(self):
+        # returns how long the CPUs have spent, in all and busy
+        t = psutil.cpu_times()
+        # guest time is already counted in user time
+        total = sum( t ) - getattr( t, 'guest', 0 ) - getattr( t, 'guest_nice', 0 )
+        idle = t.idle + getattr( t, 'iowait', 0 )
+        return total, total - idle
+    
+    def percent(self):
+        total, busy = self.times()
+        lastTotal, lastBusy = self.last
+        self.last = ( total, busy )
+        
+        if total <= lastTotal:
+            return 0.0
+        
+        return max( 0.0, min( 100.0, ( busy - lastBusy ) / ( total - lastTotal ) * 100 ) )
+
+class hbGovernor(object):
+    '''
+    Keeps HandBrakeCLI from hogging a machine that has other work to do.
+    
+    Every interval seconds the governor looks at how much of the CPU is 
+    being used by everything else (the system-wide figure, less what our
+    own HandBrakeCLI processes are using) and how much memory is free 
+    (counting what our own processes are holding as free, since 
+    suspending them doesn't give it back, and they'd never let go).
+    If either crosses its limit, the governor throttles: running encodes
+    are suspended and no new jobs are started.  Once things have calmed
+    down, they carry on.
+    
+    So that we don't flap back and forth right at the limit, the governor
+    doesn't let go until the CPU is margin percent below maxLoad and 
+    memory margin percent above minMemory.
+    
+        manager
+            the hbQueueManager this belongs to
+        maxLoad
+            default None
+            percent of the whole machine's CPU that everything else may use
+            before we back off.  None for no limit.
+        minMemory
+            default None
+            megabytes of memory that must be left free.  None for no limit.
+        interval
+            default 5
+            seconds between samples
+        margin
+            default 25
+            see above
+            
+    throttled is a CrossThreadItem holding None, or the reason we have 
+    backed off ('CPU' or 'memory').  The reason is also kept in the 
+    manager's runReport, as 'throttled'.
+    
+    Sampling looks at the manager's workers, so it doesn't begin until 
+    start() is called, once they've all been made.
+    '''
+
+    def __init__(self, manager, maxLoad=None, minMemory=None, interval=5, margin=25):
+        self.manager = manager
+        self.maxLoad = maxLoad
+        self.minMemory = minMemory
+        self.interval = interval
+        self.margin = margin
+        
+        self.throttled = CrossThreadItem( None )
+        
+        # pids we've already asked for a cpu figure.  psutil's first
+        # figure for any process is meaningless.
+        self.seen = set()
+        
+        self.wakeup = Event()
+        manager.runState.watch( self.wakeup )
+        
+        self.t = Thread( target=self.run, daemon=True )
+        
+    def start(self):
+        self.t.start()
+        
+    def isThrottled(self):
+        return self.throttled.get() is not None
+    
+    def sample(self):
+        '''
+        returns the percentage of the CPU used by everything but our own encodes, 
+        the megabytes of memory available, and whether the figures can be trusted
+        '''
+        cpus = psutil.cpu_count() or 1
+        total = self.cpu.percent()
+        ours = 0
+        oursMemory = 0
+        settled = True
+        pids = set()
+        
+        for worker in self.manager.busyWorkers():
+            
+            process = worker.process
+            
+            if process is None:
+                continue
+            
+            try:
+                # per-process figures are per core
+                ours += process.process.cpu_percent() / cpus
+                oursMemory += process.process.memory_info().rss
+            except psutil.Error:
+                continue
+            
+            pids.add( process.pid )
+            
+            if process.pid not in self.seen:
+                settled = False
+                
+        self.seen = pids
+        
+        memory = ( psutil.virtual_memory().available + oursMemory ) / 2 ** 20
+        
+        return max( 0, total - ours ), memory, settled
+    
+    def judge(self, load, memory):
+        '''
+        returns the reason to be throttled, or None
+        '''
+        throttled = self.throttled.get()
+        
+        if throttled is None:
+            # limits as given
+            maxLoad = self.maxLoad
+            minMemory = self.minMemory
+        else:
+            # limits with the margin, so we don't flap
+            maxLoad = None if self.maxLoad is None else self.maxLoad * ( 100 - self.margin ) / 100
+            minMemory = None if self.minMemory is None else self.minMemory * ( 100 + self.margin ) / 100
+            
+        if maxLoad is not None and load > maxLoad:
+            return 'CPU'
+        
+        if minMemory is not None and memory < minMemory:
+            return 'memory'
+        
+        return None
+        
+    def run(self):
+        
+        self.cpu = CPUMeter()
+        
+        while True:
+            
+            self.wakeup.clear()
+            
+            if self.manager.runState.get() == STOPPED:
+                break
+            
+            self.wakeup.wait( self.interval )
+            
+            load, memory, settled = self.sample()
+            
+            if settled == False:
+                # a new encode has started; try again next time
+                continue
+            
+            reason = self.judge( load, memory )
+            
+            if reason != self.throttled.get():
+                
+                if reason is None:
+                    self.manager.debug( 'Governor: carrying on (CPU ' + str( round( load ) ) + '%, ' + str( round( memory ) ) + 'MB free)' )
+                else:
+                    self.manager.debug( 'Governor: backing off for ' + reason + ' (CPU ' + str( round( load ) ) + '%, ' + str( round( memory ) ) + 'MB free)' )
+                    
+                self.throttled.set( reason )
+                self.manager.runReport.set( 'throttled', reason )
@@ -0,0 +1,92 @@
+'''
+Created on Feb 28, 2023
+
+@author: Cather Steincamp
+'''
+import os
+from lib.InboxWatcher import InboxWatcher
+from lib.FastCopy import moveFile
+
+# what HandBrake gets given, by extension
+MEDIA = [ 'mkv', 'mp4', 'm4v' ]
+
+def extension(name):
+    return os.path.splitext( name )[1][1:].lower()
+
+class hbInbox(object):
+    '''
+    Enqueues whatever turns up in the Inbox, as soon as it's finished 
+    arriving, using a lib.InboxWatcher.
+    
+        manager
+            the hbQueueManager to enqueue jobs with
+        inbox
+            the folder to watch
+        staging
+            default None
+            if set, each file (and its subtitles) is moved here before it's
+            enqueued, and converted from here.  Otherwise it's converted 
+            where it is.
+        settle
+            default 0.5
+            see InboxWatcher
+            
+    Each video file becomes a job converting it to an .mkv of the same 
+    name, with any .srt files whose names start with the video's name 
+    (less its extension) and a dot, as subtitles.  Subtitles have to arrive before the video
+    does, or with it; any that turn up after it's been enqueued are left 
+    where they are.
+    
+    The Inbox is listed once, when we start, to find the subtitles already
+    there.  After that, the watcher tells us about new ones.
+    
+    Call stop() to stop watching.
+    '''
+
+    def __init__(self, manager, inbox, staging=None, settle=0.5):
+        self.manager = manager
+        self.inbox = inbox
+        
+        if staging == '':
+            staging = None
+        self.staging = staging
+        
+        self.subs = set( name for name in os.listdir( inbox ) if extension( name ) == 'srt' )
+        
+        self.watcher = InboxWatcher( inbox, self.arrived, settle )
+        
+    def stop(self):
+        self.watcher.stop()
+        
+    def arrived(self, names):
+        
+        for name in names:
+            if extension( name ) == 'srt':
+                self.subs.add( name )
+                
+        for name in names:
+            if extension( name ) in MEDIA:
+                try:
+                    self.enqueue( name )
+                except Exception as e:
+                    self.manager.debug( 'Enqueueing ' + name + ' from the inbox failed: ' + repr( e ) )
+                    
+    def enqueue(self, name):
+        
+        stem = os.path.splitext( name )[0]
+        
+        # Show.S01E01.eng.srt goes with Show.S01E01.mkv, but Show.S01E010.eng.srt doesn't
+        subs = sorted( sub for sub in self.subs if sub.startswith( stem + '.' ) )
+        self.subs.difference_update( subs )
+        
+        # anything that's been taken away since we heard about it is dropped
+        subs = [ sub for sub in subs if os.path.isfile( self.inbox + sub ) ]
+        
+        if self.staging is None:
+            source = self.inbox
+        else:
+            source = self.staging
+            for filename in [ name ] + subs:
+                moveFile( self.inbox + filename, source + filename )
+        
+        return self.manager.enqueue( { 'file': name, 'target': stem + '.mkv', 'srts': subs, 'source': source } )
@@ -0,0 +1,120 @@
+'''
+Created on Feb 22, 2023
+
+@author: Cather Steincamp
+'''
+from uuid import uuid4
+
+class hbJob(object):
+    '''
+    One file to be converted, and everything needed to convert it.
+    
+    Jobs used to be plain dictionaries, with the manager's defaults filled 
+    in by whoever needed them, every time they needed them.  An hbJob has 
+    its defaults filled in once, by resolve(), when it's enqueued, and 
+    can't be changed after that, so it can be handed from thread to thread 
+    without being copied.  replace() makes a new one with some changes.
+    
+        id
+            given a new one if not provided
+        file, target
+            the file to convert, and what to call the result
+        srts
+            subtitle files to go with it
+        source, destination, backup, trash
+            folders, as in hbQueueManager
+        json, preset, guiPreset, params
+            the HandBrake configuration, as in hbQueueManager
+        priority, show
+            for the scheduler
+        duration, width, height, size
+            for the scheduler, as found by hbProbe()
+            
+    Anything not given is None (or an empty tuple, for srts).  params
+    should be treated as read-only, like the rest.
+    
+    So that code written for the old dictionaries keeps working, a job 
+    can be read like one: job['file'], job.get( 'priority', 0 ), and 
+    'backup' in job, which is True if backup isn't None.  copy() returns
+    the job itself, since there's no need for another.
+    
+    toDict() and hbJob.fromDict() turn jobs into dictionaries for the 
+    queue file and back.  toDict() leaves out anything that's None.
+    '''
+    
+    __slots__ = ( 'id', 'file', 'target', 'srts', 'source', 'destination', 'backup', 'trash', 
+                  'json', 'preset', 'guiPreset', 'params', 'priority', 'show', 
+                  'duration', 'width', 'height', 'size' )
+    
+    # the fields resolve() fills in from the manager's defaults
+    DEFAULTS = ( 'source', 'destination', 'backup', 'trash', 'json', 'preset', 'guiPreset', 'params' )
+
+    def __init__(self, **fields):
+        
+        for field in self.__slots__:
+            object.__setattr__( self, field, fields.get( field ) )
+            
+        if self.id is None:
+            object.__setattr__( self, 'id', uuid4().hex )
+            
+        if self.srts is None:
+            object.__setattr__( self, 'srts', () )
+        else:
+            object.__setattr__( self, 'srts', tuple( self.srts ) )
+            
+    def __setattr__(self, name, value):
+        raise AttributeError( 'hbJob is read-only; use replace()' )
+    
+    def __repr__(self):
+        return 'hbJob(' + repr( self.toDict() ) + ')'
+    
+    @classmethod
+    def fromDict(cls, d:dict):
+        # anything we don't know about is dropped
+        return cls( **{ field: d[field] for field in cls.__slots__ if field in d } )
+    
+    def toDict(self):
+        d = {}
+        for field in self.__slots__:
+            value = getattr( self, field )
+            if value is None or value == ():
+                continue
+            if type( value ) == tuple:
+                value = list( value )
+            d[field] = value
+        return d
+    
+    def replace(self, **changes):
+        fields = { field: getattr( self, field ) for field in self.__slots__ }
+        fields.update( changes )
+        return hbJob( **fields )
+    
+    def resolve(self, defaults:dict):
+        '''
+        returns a copy of the job with anything it doesn't say filled in from defaults
+        '''
+        changes = {}
+        for field in self.DEFAULTS:
+            if getattr( self, field ) is None and defaults.get( field ) is not None:
+                changes[field] = defaults[field]
+        
+        if len( changes ) == 0:
+            return self
+        
+        return self.replace( **changes )
+    
+    def copy(self):
+        return self
+    
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError( key )
+        return getattr( self, key )
+    
+    def __contains__(self, key):
+        return key in self.__slots__ and getattr( self, key ) is not None
+    
+    def get(self, key, default=None):
+        if key in self:
+            return getattr( self, key )
+        return default
@@ -0,0 +1,309 @@
+'''
+Created on Feb 12, 2023
+
+@author: Cather Steincamp
+'''
+
+from threading import Lock, Thread, Event
+from time import sleep
+from uuid import uuid4
+from HandBrakeUtils.job import hbJob
+import json
+import os
+
+'''
+Job States, as recorded in the journal
+
+    PENDING
+        In the queue, waiting its turn.
+    STARTED
+        Handed to a worker.  If the journal is replayed and a job is
+        still STARTED, whatever was happening to it was interrupted,
+        so it goes back to the front of the queue.
+    FINISHED
+        Converted and filed away.  Forgotten at the next compaction.
+    FAILED
+        HandBrake failed.  Not queued again, and forgotten at the next 
+        compaction, like FINISHED.
+'''
+
+PENDING, STARTED, FINISHED, FAILED = 'pending', 'started', 'finished', 'failed'
+
+class QueueJournal(object):
+    '''
+    Keeps the queue on disk, so that it survives a crash or a power cut.
+
+    Every change to the queue is appended to the journal file as a line of
+    JSON and flushed straight away.  To keep from grinding the disk, the
+    file is only fsync()ed once syncEvery records have piled up, or
+    syncInterval seconds after the last one, whichever comes first.
+
+    Every so often (compactEvery records) the whole queue is written out as
+    a snapshot, which replaces the old one in a single atomic rename, and
+    the journal is started over.  On startup, the snapshot is loaded and the
+    journal is replayed on top of it.  A half-written last line, as left by
+    a crash, is ignored.
+    
+    Each snapshot starts a new generation, and every record is marked with
+    the generation it was written in.  The snapshot remembers the last 
+    generation it covers, and records from that generation or before are
+    skipped when the journal is replayed.  So if we crash after a snapshot 
+    is written but before the journal is started over, a job the snapshot 
+    has already forgotten can't be brought back by its old records.
+
+        snapshotFile
+            where the snapshot is kept.  A plain list of jobs, as written by
+            older versions, is read as a queue of pending jobs.
+        journalFile
+            default snapshotFile + '.journal'
+        syncEvery, syncInterval, compactEvery
+            see above
+
+    Each job is an hbJob, or a dictionary, which is given an 'id' when 
+    it's enqueued if it doesn't already have one.  Jobs are kept, and 
+    handed back by pending() and failed(), as dictionaries.  Changes are 
+    recorded with:
+
+        enqueue( job )
+        start( job )
+        finish( job )
+        fail( job )
+        reorder( ids )
+                ids is a list of job ids, in the order they should be
+                processed.  Pending jobs not in the list keep their order,
+                after the ones that are.
+
+    pending() returns the list of jobs waiting to be processed, in order,
+    and failed() returns the jobs that HandBrake couldn't convert since the
+    last compaction.
+
+    close() syncs, compacts, and closes the journal.
+    '''
+
+    def __init__(self, snapshotFile, journalFile=None, syncEvery=32, syncInterval=1.0, compactEvery=1000):
+
+        if journalFile is None:
+            journalFile = snapshotFile + '.journal'
+
+        self.snapshotFile = snapshotFile
+        self.journalFile = journalFile
+        self.syncEvery = syncEvery
+        self.syncInterval = syncInterval
+        self.compactEvery = compactEvery
+
+        self.lock = Lock()
+        self.jobs = {}
+        self.states = {}
+        self.order = []
+        self.records = 0
+        self.unsynced = 0
+        
+        # the generation the snapshot covers, and the one we're writing
+        self.covered = -1
+
+        self.load()
+        self.generation = self.covered + 1
+        self.replay()
+
+        # anything that was under way when we last stopped has to be done over
+
+        restart = [ jobId for jobId in self.order if self.states[jobId] == STARTED ]
+        rest = [ jobId for jobId in self.order if self.states[jobId] != STARTED ]
+
+        for jobId in restart:
+            self.states[jobId] = PENDING
+
+        self.order = restart + rest
+
+        self.file = open( self.journalFile, 'a', encoding='utf-8' )
+        self.compact()
+
+        self.syncNeeded = Event()
+        self.active = True
+        self.t = Thread( target=self.syncLoop, daemon=True )
+        self.t.start()
+
+    def load(self):
+
+        if os.path.isfile( self.snapshotFile ) == False:
+            return
+
+        f = open( self.snapshotFile, 'r', encoding='utf-8' )
+        try:
+            snapshot = json.load( f )
+        except json.JSONDecodeError:
+            snapshot = []
+        f.close()
+
+        if type( snapshot ) == list:
+            # the old format: just the queue
+            snapshot = { 'jobs': snapshot, 'states': {} }
+            
+        self.covered = snapshot.get( 'generation', -1 )
+
+        for job in snapshot['jobs']:
+            if 'id' not in job:
+                job['id'] = self.newId()
+            self.jobs[job['id']] = job
+            self.states[job['id']] = snapshot['states'].get( job['id'], PENDING )
+            self.order.append( job['id'] )
+
+    def replay(self):
+
+        if os.path.isfile( self.journalFile ) == False:
+            return
+
+        f = open( self.journalFile, 'r', encoding='utf-8' )
+
+        for line in f:
+            try:
+                record = json.loads( line )
+            except json.JSONDecodeError:
+                # torn write from a crash
+                continue
+            
+            if record.get( 'gen', 0 ) <= self.covered:
+                # already in the snapshot
+                continue
+            
+            self.apply( record )
+
+        f.close()
+
+    def apply(self, record):
+
+        op = record['op']
+
+        if op == 'enqueue':
+            job = record['job']
+            if job['id'] not in self.jobs:
+                self.jobs[job['id']] = job
+                self.order.append( job['id'] )
+            self.states[job['id']] = PENDING
+
+        elif op == 'reorder':
+            ids = [ jobId for jobId in record['ids'] if jobId in self.jobs ]
+            listed = set( ids )
+            self.order = ids + [ jobId for jobId in self.order if jobId not in listed ]
+
+        elif record['id'] in self.jobs:
+            self.states[record['id']] = op
+
+    def newId(self):
+        return uuid4().hex
+
+    def record(self, record):
+
+        with self.lock:
+            record['gen'] = self.generation
+            self.apply( record )
+            
+            if self.file is None:
+                # closed; nothing more goes to disk
+                return
+            
+            self.file.write( json.dumps( record, separators=(',',':') ) + '\n' )
+            self.file.flush()
+            self.records += 1
+            self.unsynced += 1
+
+            if self.unsynced >= self.syncEvery:
+                self.sync()
+
+            if self.records >= self.compactEvery:
+                self.compact()
+
+        self.syncNeeded.set()
+
+    def enqueue(self, job):
+        if isinstance( job, hbJob ):
+            job = job.toDict()
+        elif 'id' not in job:
+            job['id'] = self.newId()
+        self.record( { 'op': 'enqueue', 'job': job } )
+        return job['id']
+
+    def start(self, job:dict):
+        self.record( { 'op': STARTED, 'id': job['id'] } )
+
+    def finish(self, job:dict):
+        self.record( { 'op': FINISHED, 'id': job['id'] } )
+
+    def fail(self, job:dict):
+        self.record( { 'op': FAILED, 'id': job['id'] } )
+
+    def reorder(self, ids:list):
+        self.record( { 'op': 'reorder', 'ids': list( ids ) } )
+
+    def pending(self):
+        with self.lock:
+            return [ self.jobs[jobId].copy() for jobId in self.order if self.states[jobId] == PENDING ]
+
+    def failed(self):
+        with self.lock:
+            return [ self.jobs[jobId].copy() for jobId in self.order if self.states[jobId] == FAILED ]
+
+    def sync(self):
+        # only called while holding the lock
+        if self.unsynced > 0:
+            os.fsync( self.file.fileno() )
+            self.unsynced = 0
+
+    def syncLoop(self):
+
+        while self.active:
+            self.syncNeeded.wait()
+            self.syncNeeded.clear()
+
+            # give the batch a chance to fill up
+            sleep( self.syncInterval )
+
+            with self.lock:
+                if self.file is not None:
+                    self.sync()
+
+    def compact(self):
+        # only called while holding the lock, or before anyone else has it
+
+        for jobId in self.order:
+            if self.states[jobId] in ( FINISHED, FAILED ):
+                del self.jobs[jobId]
+                del self.states[jobId]
+
+        self.order = [ jobId for jobId in self.order if jobId in self.jobs ]
+
+        snapshot = { 'jobs': [ self.jobs[jobId] for jobId in self.order ],
+                     'states': { jobId: self.states[jobId] for jobId in self.order },
+                     'generation': self.generation }
+
+        tmp = self.snapshotFile + '.tmp'
+        f = open( tmp, 'w', encoding='utf-8' )
+        json.dump( snapshot, f, separators=(',',':') )
+        f.flush()
+        os.fsync( f.fileno() )
+        f.close()
+        os.replace( tmp, self.snapshotFile )
+
+        # the snapshot has everything now, so the journal can start over.
+        # if we crash right here, the old journal's records are all from 
+        # this generation or before, so they'll be skipped when it's replayed.
+
+        self.covered = self.generation
+        self.generation += 1
+
+        self.file.close()
+        self.file = open( self.journalFile, 'w', encoding='utf-8' )
+        os.fsync( self.file.fileno() )
+        self.records = 0
+        self.unsynced = 0
+
+    def close(self):
+        with self.lock:
+            if self.file is None:
+                return
+            self.sync()
+            self.compact()
+            self.file.close()
+            self.file = None
+            self.active = False
+        self.syncNeeded.set()
@@ -0,0 +1,157 @@
+'''
+Created on Feb 14, 2023
+
+@author: Cather Steincamp
+'''
+from lib import CrossThreadList, CrossThreadDict
+from lib.FastCopy import copyFile, moveFile, copyAndHash
+from os import remove as filedelete
+from HandBrakeUtils.states import *
+from HandBrakeUtils import events
+from threading import Thread, Event
+
+class hbPostProcessor(object):
+    '''
+    Once HandBrakeCLI has finished with a file, the file still has to be
+    moved to its destination, backed up, and the original sent to the
+    trash, any of which can take minutes on a slow network drive.  The
+    post-processor does all of that with its own pool of threads, so
+    that the worker can start the next encode straight away.
+    
+    Files are copied and moved with lib.FastCopy, which renames when it
+    can and otherwise lets the kernel do the copying.  If the manager has
+    a manifest, backups are hashed as they're copied instead, and
+    recorded in the manifest.
+
+    Each task is a dictionary with:
+
+        job
+            the hbJob, as taken from the queue
+        tmp, source, destination, backup, trash
+            the folders for this job, already resolved from the job
+            and the manager's defaults.  backup and trash may be None.
+        srts
+            the list of temporary subtitle files, or False
+
+    Once a task is finished with, successfully or not, the temporary srts 
+    and anything left in tmp are deleted.  The job is counted as done 
+    only if every step succeeded.
+
+    The state of each file (MOVING, BACKINGUP, or CLEANUP) is kept in
+    files, a CrossThreadDict keyed by the job's target, from the moment
+    it is submitted until it's done.  The manager waits for it to empty
+    out before it stops.
+    '''
+
+    def __init__(self, manager, workers=2):
+        '''
+        manager
+            the hbQueueManager this belongs to
+        workers
+            default 2
+            how many files may be handled at the same time
+        '''
+        self.manager = manager
+        self.tasks = CrossThreadList()
+        self.files = CrossThreadDict()
+
+        self.wakeup = Event()
+        self.tasks.watch( self.wakeup )
+        manager.runState.watch( self.wakeup )
+
+        self.threads = []
+
+        for i in range( 0, max( 1, workers ) ):
+            t = Thread( target=self.run )
+            t.start()
+            self.threads.append( t )
+
+    def submit(self, task:dict):
+        self.files.set( task['job'].target, MOVING )
+        self.tasks.append( task )
+
+    def pending(self):
+        return self.files.length()
+
+    def first(self):
+        '''
+        returns the target and state of the first file being handled, or None
+        '''
+        files = self.files.copy()
+        for target in files:
+            return ( target, files[target] )
+        return None
+
+    def run(self):
+
+        while True:
+
+            self.wakeup.clear()
+
+            task = self.tasks.pop(0)
+
+            if task is None:
+                if self.manager.runState.get() == STOPPED:
+                    break
+                self.wakeup.wait()
+                continue
+
+            try:
+                self.process( task )
+                self.manager.runReport.increment( 'done' )
+            except Exception as e:
+                self.manager.debug( 'Post-processing ' + task['job'].target + ' failed: ' + repr( e ) )
+                self.manager.runReport.increment( 'err' )
+                if self.manager.journal is not None:
+                    self.manager.journal.fail( task['job'] )
+                self.manager.events.publish( events.FAILED, job=task['job'], error=repr( e ) )
+            finally:
+                self.cleanup( task )
+                self.files.pop( task['job'].target )
+                
+    def cleanup(self, task):
+        '''
+        removes the temporary srts, and the converted file if it never
+        made it out of tmp, whether or not the task succeeded
+        '''
+        leftovers = [ task['tmp'] + task['job'].target ]
+        
+        if task['srts'] != False:
+            leftovers.extend( task['srts'] )
+            
+        for leftover in leftovers:
+            try:
+                filedelete( leftover )
+            except FileNotFoundError:
+                pass
+
+    def process(self, task):
+
+        job = task['job']
+        target = job.target
+        destination = task['destination']
+        source = task['source']
+
+        self.files.set( target, MOVING )
+
+        moveFile( task['tmp'] + target, destination + target )
+        self.manager.events.publish( events.MOVED, job=job )
+
+        if task['backup'] is not None:
+            self.files.set( target, BACKINGUP )
+            if self.manager.manifest is None:
+                copyFile( destination + target, task['backup'] + target )
+            else:
+                size, digest = copyAndHash( destination + target, task['backup'] + target, self.manager.manifest.algorithm )
+                self.manager.manifest.record( task['backup'] + target, size, digest )
+            self.manager.events.publish( events.BACKEDUP, job=job )
+
+        self.files.set( target, CLEANUP )
+
+        if task['trash'] is not None:
+            moveFile( source + job.file, task['trash'] + job.file )
+
+        if self.manager.journal is not None:
+            self.manager.journal.finish( job )
+            
+        self.manager.events.publish( events.FINISHED, job=job )
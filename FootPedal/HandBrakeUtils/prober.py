@@ -0,0 +1,66 @@
+'''
+Created on Mar 1, 2023
+
+@author: Cather Steincamp
+'''
+from lib import CrossThreadList
+from HandBrakeUtils.process import hbProbe
+from threading import Thread, Event
+
+class hbProber(object):
+    '''
+    Asks HandBrakeCLI how long each job is, for the SHORTEST policy, in 
+    a thread of its own.  A scan can take a minute or two on a slow drive,
+    and whoever enqueued the job (the UI, or the inbox) shouldn't be kept 
+    waiting for it.
+    
+    Jobs are queued straight away, ranked by their size until the probe
+    comes back.  Once it does, the job in the queue is swapped for one 
+    with the duration, width, and height filled in, and filed again 
+    under its real cost.  A job that's been taken by a worker by then is 
+    left alone.
+    
+        manager
+            the hbQueueManager this belongs to
+            
+    submit( job ) queues a job to be probed, and pending() returns how 
+    many are waiting.
+    '''
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.jobs = CrossThreadList()
+        
+        self.wakeup = Event()
+        self.jobs.watch( self.wakeup )
+        
+        self.t = Thread( target=self.run, daemon=True )
+        self.t.start()
+        
+    def submit(self, job):
+        self.jobs.append( job )
+        
+    def pending(self):
+        return self.jobs.length()
+        
+    def run(self):
+        
+        while True:
+            
+            self.wakeup.clear()
+            
+            job = self.jobs.read( 0 )
+            
+            if job is None:
+                self.wakeup.wait()
+                continue
+            
+            # no point probing a job that's already been taken
+            if self.manager.queue.get( job.id ) is not None:
+                
+                probe = hbProbe( job.source + job.file, self.manager.cli )
+                
+                if 'duration' in probe:
+                    self.manager.queue.update( job.replace( **probe ) )
+                    
+            self.jobs.pop( 0 )
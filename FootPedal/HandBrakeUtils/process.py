@@ -4,16 +4,316 @@ Created on Dec 22, 2022
 @author: Cather Steincamp
 '''
 from lib import Pwatch
-from lib.CrossThreaders import CrossThreadDict
+from lib.Awatch import Awatch, AsyncEngine
+from lib.CrossThreaders import FrozenCrossThreadDict
+from lib.Transcript import Transcript
+from os.path import basename
 import re 
-from time import sleep, time
+from json import loads as jsonparse, JSONDecodeError, JSONDecoder
+from subprocess import run, PIPE, DEVNULL, SubprocessError
+from time import time
 
-class hbProcess(Pwatch):
+# Everything hbOutput looks for in a line of HandBrake output, so that a line
+# can be picked apart in a single pass.  For example:
+#     Encoding: task 1 of 1, 45.23 % (120.45 fps, avg 118.22 fps, ETA 00h05m12s)
+
+PROGRESS = re.compile( 'ask (?P<task>\\d) of (?P<taskTotal>\\d)'
+                       '| (?P<percent>\\d{1,2}\\.\\d\\d) %'
+                       '|\\((?P<fpsNow>[^ ]*) fps. avg (?P<fpsAvg>[^ ]*) fps'
+                       '|ETA (?P<hours>..)h(?P<minutes>..)m(?P<seconds>..)s'
+                       '|(?P<mux>mux: track|Muxing :)'
+                       '|(?P<done>Encode done!|Finished work)' )
+
+def parseProgress(output):
+    '''
+    Picks apart a line of HandBrake output.  Returns a dictionary with task, 
+    taskTotal, %, fpsNow, fpsAvg, and eta, any of which will be blank if 
+    they aren't in the line, and success, if the line says it's done.
+    '''
+    
+    report = { 'task':'', 'taskTotal':'', '%':'', 'fpsNow':'', 'fpsAvg':'', 'eta':'' }
+    muxing = False
+    
+    for match in PROGRESS.finditer( output ):
+        
+        group = match.lastgroup
+        
+        if group == 'taskTotal':
+            report['task'] = match.group( 'task' )
+            report['taskTotal'] = match.group( 'taskTotal' )
+        elif group == 'percent':
+            report['%'] = match.group( 'percent' ) + '%'
+        elif group == 'fpsAvg':
+            report['fpsNow'] = match.group( 'fpsNow' )
+            report['fpsAvg'] = match.group( 'fpsAvg' )
+        elif group == 'seconds':
+            report['eta'] = 'ETA ' + match.group( 'hours' ) + ':' + match.group( 'minutes' ) + ':' + match.group( 'seconds' )
+        elif group == 'mux':
+            muxing = True
+        elif group == 'done':
+            report['success'] = True
+            
+    if muxing and report['eta'] == '':
+        report['eta'] = '   Muxing...'
+            
+    return report
+
+# With --json, HandBrakeCLI reports progress in blocks like this:
+#     Progress: {
+#         "State": "WORKING",
+#         "Working": { "Progress": 0.4523, "Rate": 120.45, "RateAvg": 118.2, ... }
+#     }
+
+JSONBLOCK = re.compile( '^(?P<name>[A-Za-z][\\w ]*): (?P<start>\\{.*)$' )
+
+def parseJsonProgress(progress:dict):
+    '''
+    Translates a --json Progress block into the same report parseProgress()
+    produces, plus these, which the text output doesn't have:
+    
+        state
+            HandBrake's own state, eg. 'SCANNING', 'WORKING', 'MUXING', 'WORKDONE'
+        progress
+            fraction complete, from 0 to 1
+        etaSeconds
+            seconds remaining
+    '''
+    
+    state = progress.get( 'State', '' )
+    report = { 'state': state }
+    
+    if state == 'WORKING':
+        working = progress.get( 'Working', {} )
+        
+        report['progress'] = working.get( 'Progress', 0.0 )
+        report['%'] = '{:.2f}%'.format( report['progress'] * 100 )
+        report['fpsNow'] = '{:.2f}'.format( working.get( 'Rate', 0.0 ) )
+        report['fpsAvg'] = '{:.2f}'.format( working.get( 'RateAvg', 0.0 ) )
+        
+        if 'PassCount' in working and working['PassCount'] > 0:
+            report['task'] = str( working.get( 'Pass', 1 ) )
+            report['taskTotal'] = str( working['PassCount'] )
+        else:
+            report['task'] = ''
+            report['taskTotal'] = ''
+        
+        if 'ETASeconds' in working:
+            report['etaSeconds'] = working['ETASeconds']
+            report['eta'] = 'ETA {:02d}:{:02d}:{:02d}'.format( working.get( 'Hours', 0 ), working.get( 'Minutes', 0 ), working.get( 'Seconds', 0 ) )
+        else:
+            report['eta'] = ''
+            
+    elif state == 'MUXING':
+        report['eta'] = '   Muxing...'
+        report['fpsNow'] = ''
+        report['fpsAvg'] = ''
+        
+    elif state == 'WORKDONE':
+        report['success'] = progress.get( 'WorkDone', {} ).get( 'Error', 1 ) == 0
+        report['eta'] = ''
+        report['fpsNow'] = ''
+        report['fpsAvg'] = ''
+        
+    return report
+
+def hbArguments(sourceFile, outputFile, srts, preset, guiPreset, json, params, cli, sublang, jsonProgress=False):
+    '''
+    Builds the list of arguments for HandBrakeCLI.  See hbProcess for what
+    each of the arguments means.
+    '''
+    
+    processargs = [ cli ]
+    
+    if jsonProgress:
+        processargs.append( '--json' )
+    
+    if preset != None:
+        processargs.extend( ['--preset', preset ] )
+        
+    if guiPreset != None:
+        processargs.extend( ['--preset-import-gui', guiPreset ] )
+        
+    if json != None:
+        processargs.extend( ['--preset-import-file', json ] )
+        
+    for param in params:
+        
+        if params[param] == '':
+            processargs.append( param )
+        else:
+            processargs.extend( [param, params[param] ] )
+        
+    processargs.extend([ '-i', sourceFile, '-o', outputFile ])
+        
+    if srts != False :
+        
+        if type( srts ) == str:
+            subs = [ srts ]
+        else:
+            subs = srts
+        
+        sublist = ''
+        sublangs = ''
+        
+        for i in range(0, len(subs)):
+            
+            sublist += subs[i]
+            
+            r =  re.split( '\.(...)\.srt$', subs[i] )
+            
+            if len( r ) > 1 :
+                sublangs += r[1]
+            else:
+                sublangs += sublang
+            
+            if i != len(subs) - 1 :
+                sublist +=','
+                sublangs +=','
+                
+        processargs.extend( [ '--srt-file', sublist, '--srt-lang', sublangs ] )
+        
+    return processargs
+
+def hbProbe(sourceFile, cli, timeout=120):
+    '''
+    Asks HandBrakeCLI about the main feature of sourceFile, for the scheduler.
+    Returns a dictionary with its duration (in seconds), width, and height, 
+    or an empty one if HandBrake couldn't tell us.
+    '''
+    
+    try:
+        result = run( [ cli, '--json', '--scan', '--main-feature', '-i', sourceFile ], 
+                      stdout=PIPE, stderr=DEVNULL, text=True, timeout=timeout )
+    except ( OSError, SubprocessError ):
+        return {}
+    
+    start = result.stdout.find( 'JSON Title Set: ' )
+    
+    if start == -1:
+        return {}
+    
+    try:
+        titles, end = JSONDecoder().raw_decode( result.stdout, start + len( 'JSON Title Set: ' ) )
+        # with --main-feature, that's the only title scanned
+        title = titles['TitleList'][0]
+        duration = title['Duration']
+        return { 'duration': duration['Hours'] * 3600 + duration['Minutes'] * 60 + duration['Seconds'],
+                 'width': title['Geometry']['Width'], 'height': title['Geometry']['Height'] }
+    except ( JSONDecodeError, KeyError, IndexError, TypeError ):
+        return {}
+
+class hbOutput(object):
+    '''
+    The parts of hbProcess that deal with HandBrake's output, rather 
+    than with the process itself, so that they can be shared by 
+    hbProcess and hbAsyncProcess.
+    
+    Everything HandBrake says goes into output, a Transcript written to 
+    the log folder as it arrives, with only the most recent lines kept
+    in memory.  Once the job is over, writeOutputLog() keeps it, and
+    discardOutputLog() gets rid of it.
+    
+    In JSON mode, Progress blocks are collected a line at a time and 
+    parsed as each one closes.  Until the first one turns up, every
+    other line is read as text, as usual; after that, JSON has the 
+    final say, and text lines are only kept for the log.
+    
+    If onProgress is given, it's called with each report that has a 
+    percentage in it, from whichever thread reads the output, so it had 
+    better be quick.
+    '''
+    
+    def setupOutput(self, log, outputFile, jsonProgress=False, onProgress=None):
+        self.output = Transcript( log + basename( outputFile ) + '.transcript' )
+        # read far more often than it's written
+        self.data = FrozenCrossThreadDict( {'%':''} )
+        self.data.set( 'success', False )
+        self.log = log
+        self.onProgress = onProgress
+        
+        self.jsonProgress = jsonProgress
+        self.jsonSeen = False
+        self.block = None
+        self.blockName = None
+        self.blockDepth = 0
+        
+    def debug(self, debug):
+        f = open( self.log + 'process.log', 'a' )
+        f.write( str( debug ) + '\n' )
+        f.close()
+        
+    def processOutput(self, output):
+        
+        self.output.append( output )
+        
+        if self.jsonProgress and self.processJson( output ):
+            return
+        
+        if self.jsonSeen == False:
+            self.progressed( parseProgress( output ) )
+            
+    def progressed(self, report):
+        
+        self.data.update( report )
+        
+        if self.onProgress is not None and report.get( '%', '' ) != '':
+            self.onProgress( report )
+        
+    def processJson(self, output):
+        '''
+        returns True if the line was part of a JSON block.
+        '''
+        
+        if self.block is None:
+            
+            match = JSONBLOCK.match( output )
+            
+            if match is None:
+                return False
+            
+            self.blockName = match.group( 'name' )
+            self.block = []
+            self.blockDepth = 0
+            output = match.group( 'start' )
+            
+        self.block.append( output )
+        self.blockDepth += output.count( '{' ) - output.count( '}' )
+        
+        if self.blockDepth > 0:
+            # not done yet
+            return True
+        
+        text = '\n'.join( self.block )
+        name = self.blockName
+        self.block = None
+        
+        if name != 'Progress':
+            # there's also Version, JSON Job, and so on, none of which we need
+            return True
+        
+        try:
+            progress = jsonparse( text )
+        except JSONDecodeError:
+            return True
+        
+        self.jsonSeen = True
+        self.progressed( parseJsonProgress( progress ) )
+        
+        return True
+        
+    def writeOutputLog(self, filename):
+        self.output.save( self.log + filename + '.log' )
+        
+    def discardOutputLog(self):
+        self.output.discard()
+        
+class hbProcess(hbOutput, Pwatch):
     '''
     This class extends Pwatch for specific use with HandBrake CLI.
     
     information parsed from the output is available through the data 
-    attribute, which is a CrossThreadDict.
+    attribute, which is a FrozenCrossThreadDict, so data.copy() can't
+    be changed.
     
     The following information is available in data.  Items marked
     with an asterisk may return blanks if the most recent output
@@ -39,7 +339,8 @@ class hbProcess(Pwatch):
 
 
     def __init__(self, sourceFile, outputFile, srts, 
-                 preset, guiPreset, json, params, cli, log, sublang):
+                 preset, guiPreset, json, params, cli, log, sublang, jsonProgress=False, supervisor=None,
+                 onProgress=None):
         '''
         sourcefile         
                 The full paths and filename of the file to be converted.
@@ -68,119 +369,52 @@ class hbProcess(Pwatch):
             The full path and filename of the HandbrakeCLI.  
         log
             Folder where logs go.
+        jsonProgress
+            default False
+            if True, HandBrakeCLI is run with --json, and progress is read from 
+            its JSON reports rather than from the text.  This also adds state,
+            progress, and etaSeconds to data; see parseJsonProgress().
+        supervisor
+            default None
+            a lib.PipeSupervisor to read HandBrake's output, instead of a 
+            thread of this process's own.
+        onProgress
+            default None
+            called with each progress report; see hbOutput.
         '''
         
-        self.output = []
-        self.data = CrossThreadDict( {'%':''} )
-        self.data.set( 'success', False )
-        self.log = log
+        self.setupOutput( log, outputFile, jsonProgress, onProgress )
         
-        processargs = [ cli ]
+        processargs = hbArguments( sourceFile, outputFile, srts, preset, guiPreset, json, params, cli, sublang, jsonProgress )
         
-        if preset != None:
-            processargs.extend( ['--preset', preset ] )
-            
-        if guiPreset != None:
-            processargs.extend( ['--preset-import-gui', guiPreset ] )
-            
-        if json != None:
-            processargs.extend( ['--preset-import-file', json ] )
-            
-        for param in params:
-            
-            if params[param] == '':
-                processargs.extend( param )
-            else:
-                processargs.extend( [param, params[param] ] )
-            
-        processargs.extend([ '-i', sourceFile, '-o', outputFile ])
-            
-        if srts != False :
-            
-            if type( srts ) == str:
-                subs = [ srts ]
-            
-            sublist = ''
-            sublangs = ''
-            
-            for i in range(0, len(subs)):
-                
-                sublist += subs[i]
-                
-                r =  re.split( '\.(...)\.srt$', subs[i] )
-                
-                if len( r ) > 1 :
-                    sublangs += r[1]
-                else:
-                    sublangs += sublang
-                
-                if i != len(subs) - 1 :
-                    sublist +=','
-                    sublangs +=','
-                    
-            processargs.extend( [ '--srt-file', sublist, '--srt-lang', sublangs ] )
+        try:
+            Pwatch.__init__(self, processargs, supervisor=supervisor, text=True )
+        except:
+            self.discardOutputLog()
+            raise
             
-        Pwatch.__init__(self, processargs, text=True )
         self.data.set( 'start', time() )
         
-    def debug(self, debug):
-        f = open( self.log + 'process.log', 'a' )
-        f.write( str( debug ) + '\n' )
-        f.close()
-        
-    def processOutput(self, output):
-        
-        self.output.append( output )
-        report={}
-        
-        r = re.split( 'ask (\d) of (\d)', output )
-        
-        if len( r ) > 1:
-            report['task'] = r[1]
-            report['taskTotal'] = r[2]
-        else:            
-            report['task'] = ''
-            report['taskTotal'] = ''
-            
-        r = re.split( ' (\d{1,2}\.\d\d) \%', output )
-        
-        if len( r ) > 1:
-            report['%'] = r[1] + '%'
-        else:
-            report['%'] = ''
-            
-        r = re.split( '\((.*) fps. avg (.*) fps', output )
-                
-        if len( r ) > 1 :                      
-        
-            report['fpsNow'] = r[1]
-            report['fpsAvg'] = r[2]
-        else:
-            report['fpsNow'] = ''
-            report['fpsAvg'] = ''
-                    
-        r = re.split( 'ETA (..)h(..)m(..)s', output )
-        
-        if len( r ) > 1 :
-            report['eta'] = 'ETA ' + r[1] + ':' + r[2] + ':' + r[3]
-        elif len( re.split( '(mux\: track|Muxing \:)', output ) ) > 1:
-            report['eta'] = '   Muxing...'
-        else:
-            report['eta'] = ''
-                
-        if len( re.split( 'Encode done\!|Finished work', output ) ) > 1:
-            report['success'] = True
-            
-        self.data.update(report)
-        sleep(0.05)
-        
-    def writeOutputLog(self, filename):
-        f = open( self.log + filename + '.log', 'w' )
-        for line in self.output:
-            f.write( line + '\n' )
-        f.close()
-        
+class hbAsyncProcess(hbOutput, Awatch):
+    '''
+    Works exactly like hbProcess, except that the process is supervised by 
+    an AsyncEngine instead of by threads of its own, so that one engine can 
+    look after many encodes at once.  
+    
+    The arguments are the same as hbProcess, plus the engine.
+    '''
+    
+    def __init__(self, sourceFile, outputFile, srts, 
+                 preset, guiPreset, json, params, cli, log, sublang, engine:AsyncEngine, jsonProgress=False,
+                 onProgress=None):
         
+        self.setupOutput( log, outputFile, jsonProgress, onProgress )
         
+        processargs = hbArguments( sourceFile, outputFile, srts, preset, guiPreset, json, params, cli, sublang, jsonProgress )
         
-        
\ No newline at end of file
+        try:
+            Awatch.__init__(self, processargs, engine, text=True )
+        except:
+            self.discardOutputLog()
+            raise
+        self.data.set( 'start', time() )
@@ -3,77 +3,48 @@ Created on Dec 22, 2022
 
 @author: Cather Steincamp
 '''
-from lib import CrossThreadList, CrossThreadItem, CrossThreadDict
-from time import sleep
+from lib import CrossThreadList, CrossThreadItem, FrozenCrossThreadDict, Manifest, EventBus
 import re
-from shutil import copy2 as filecopy, move as filemove
-from os import remove as filedelete, rename as filerename
-from HandBrakeUtils import hbProcess
-from threading import Thread
-
-''' 
-Queue States
-
-    WAITING
-        No jobs to convert.  Will convert if jobs are added.
-    RUNNING
-        Processing, and will continue to process until all items are complete,
-        then change to WAITING
-    IDLE
-        Not currently processing, although there are jobs in the queue.
-        Will start again when you tell it.
-    IDLEAFTER
-        Processing, but after this item is complete, will change
-        to IDLE
-    STOPAFTER
-        Processing, but after this item is complete, will change
-        to STOPPED
-    STOPPING
-        In the process of cancelling a job and cleaning up, then
-        will change to STOPPED
-    STOPPED
-        No longer processing; expecting app shutdown
-'''
-
-WAITING, RUNNING, IDLE, IDLEAFTER, STOPAFTER, STOPPING, STOPPED = 0,1,2,3,4,5,6
-
-'''
-Item States
-
-    WAITING (variable does double duty)
-        No item currently being processed.
-        Handbrake CLI is not running.
-    CONVERTING
-        HandBrakeCLI is currently processing the item.
-    SUSPENDED
-        HandBrakeCLI has been suspended.
-    MOVING
-        HandBrakeCLI has completed.
-        The file is complete and being moved to its final destination
-    BACKINGUP
-        HandBrakeCLI has completed.
-        The file is being backed up to a second destination
-    CLEANUP
-        HandBrakeCLI has completed.
-        any temporary subtitles being deleted
-        original files being moved to trash folder   
-        
-'''
-
-CONVERTING, SUSPENDED, MOVING, BACKINGUP, CLEANUP = 1,2,3,4,5
-
+from lib.FastCopy import copyFile as filecopy
+from os import remove as filedelete
+from os.path import getsize
+from HandBrakeUtils import hbProcess, hbAsyncProcess, QueueJournal
+from HandBrakeUtils.prober import hbProber
+from HandBrakeUtils.scheduler import hbScheduler, FIFO, SHORTEST
+from HandBrakeUtils.job import hbJob
+from HandBrakeUtils.postProcess import hbPostProcessor
+from HandBrakeUtils.governor import hbGovernor
+from HandBrakeUtils.concurrency import hbConcurrency
+from HandBrakeUtils.states import *
+from HandBrakeUtils import events
+from threading import Thread, Event
+from traceback import format_exc
 
 class hbQueueManager(object):
     '''
-    classdocs
+    Manages the queue of files to be converted.  Jobs are handed out
+    to a pool of hbWorkers, each of which runs its own HandBrakeCLI
+    process, so that several files can be converted at once.
+    
+    Rather than polling, the manager and its workers sleep on a 
+    threading.Event (wakeup) that is set whenever runState, a jobState, 
+    the queue, or a HandBrakeCLI process changes.
+    
+    Anything else that wants to know what's going on can subscribe to
+    events, an EventBus, rather than polling.  See HandBrakeUtils.events
+    for what's published.
     '''
 
 
     def __init__(self, source, destination, trash, backup, json, preset, guiPreset, params, 
-                 tmp, cli, sublang, log, queue=CrossThreadList()):
+                 tmp, cli, sublang, log, queue=CrossThreadList(), workers=1, engine=None,
+                 jsonProgress=False, supervisor=None, journal:QueueJournal=None, ioWorkers=2,
+                 manifest:Manifest=None, maxLoad=None, minMemory=None, margin=25, maxWorkers=None,
+                 policy=FIFO, bus:EventBus=None):
         '''
         
-        All of the following are DEFAULTS, and can be overriden by the individual item
+        All of the following are DEFAULTS, and can be overriden by the individual item.
+        They're filled in to each job when it's enqueued (see hbJob.resolve()).
         
             source
                 the default location to look for a file (and its subtitles) to convert
@@ -100,7 +71,57 @@ class hbQueueManager(object):
             tmp
                 where the output file, and temporary subtitle files, will be during conversion
             queue
-                CrossThreadList that contains a dictionary of each the items to be processes.
+                an hbScheduler of hbJobs, or a list or CrossThreadList of hbJobs
+                or dictionaries of each of the items to be processed.  A list is 
+                resolved and loaded into an hbScheduler with the given policy.
+            workers
+                default 1
+                the number of HandBrakeCLI processes that may run at the same time.
+            engine
+                default None
+                a lib.AsyncEngine.  If provided, every HandBrakeCLI process is
+                supervised by that engine's event loop (see hbAsyncProcess)
+                rather than by threads of its own.
+            jsonProgress
+                default False
+                if True, progress is read from HandBrakeCLI's --json output.
+            supervisor
+                default None
+                a lib.PipeSupervisor.  If provided, the output of every HandBrakeCLI
+                process is read by the supervisor's one thread.  Ignored if an
+                engine is given, since the engine already does the same job.
+            journal
+                default None
+                a QueueJournal.  If provided, jobs added with enqueue() and moved 
+                with moveJob(), and every job started, finished, or failed, are 
+                recorded, so that the queue can be picked up where it left off.
+            ioWorkers
+                default 2
+                how many converted files the post-processor may move, back up, 
+                and clean up after at the same time.  See hbPostProcessor.
+            manifest
+                default None
+                a lib.Manifest.  If provided, backups are checksummed as they 
+                are copied, and recorded in it.
+            maxLoad, minMemory, margin
+                default None, None, 25
+                if either limit is set, an hbGovernor keeps an eye on the machine
+                and suspends encodes (and holds off on new ones) whenever 
+                everything else needs more than maxLoad percent of the CPU,
+                or there's less than minMemory megabytes free.  See hbGovernor.
+            maxWorkers
+                default None
+                if more than workers, the pool has maxWorkers workers, and an
+                hbConcurrency controller decides how many of them may run at 
+                once, starting from workers.  See hbConcurrency.
+            policy
+                default FIFO
+                the order jobs are taken in, if queue isn't already an 
+                hbScheduler.  See HandBrakeUtils.scheduler.
+            bus
+                default None
+                an EventBus to publish events on.  If None, the manager
+                makes one of its own.  Either way, it's kept in events.
                 
         '''
         
@@ -117,14 +138,66 @@ class hbQueueManager(object):
         self.trash = trash
         self.backup = backup
         self.log = log
-        self.queue = queue
+        
+        if isinstance( queue, hbScheduler ):
+            self.queue = queue
+        else:
+            if isinstance( queue, CrossThreadList ):
+                queue = queue.copy()
+            self.queue = hbScheduler( policy, [ self.resolve( job ) for job in queue ] )
+            
         self.cli = cli 
         
+        if self.queue.policy == SHORTEST:
+            self.prober = hbProber( self )
+            for job in self.queue.snapshot():
+                if job.duration is None:
+                    self.prober.submit( job )
+        else:
+            self.prober = None
+            
+        self.engine = engine
+        self.jsonProgress = jsonProgress
+        self.supervisor = supervisor
+        self.journal = journal
+        self.manifest = manifest
+        
+        if bus is None:
+            bus = EventBus( events.LOSSY )
+        self.events = bus
+        
+        self.wakeup = Event()
+        
         self.runState = CrossThreadItem( WAITING )
-        self.jobState = CrossThreadItem( WAITING )
-        self.runReport = CrossThreadDict( {'err': 0, 'done':0, 'queued':queue.length(), 'runState': WAITING, 'file':None })
+        self.runState.watch( self.wakeup )
+        self.queue.watch( self.wakeup )
+        
+        self.runReport = FrozenCrossThreadDict( {'err': 0, 'done':0, 'queued':self.queue.length(), 'runState': WAITING, 
+                                           'file':None, 'files':[], 'running':0, 'throttled':None })
+        
+        if maxLoad is None and minMemory is None:
+            self.governor = None
+        else:
+            self.governor = hbGovernor( self, maxLoad, minMemory, margin=margin )
+            self.governor.throttled.watch( self.wakeup )
+        
+        self.workers = []
+        
+        for i in range( 0, max( 1, workers, maxWorkers or 0 ) ):
+            self.workers.append( hbWorker( self, i ) )
+            
+        if self.governor is not None:
+            self.governor.start()
+            
+        if maxWorkers is None or maxWorkers <= workers:
+            self.concurrency = None
+        else:
+            self.concurrency = hbConcurrency( self, workers )
+            self.concurrency.limit.watch( self.wakeup )
+            
+        self.post = hbPostProcessor( self, ioWorkers )
+        self.post.files.watch( self.wakeup )
         
-        self.process = None
         self.t = Thread( target=self.run)
         self.t.start()
             
@@ -134,198 +207,424 @@ class hbQueueManager(object):
         f.write( str( debug ) + '\n' )
         f.close()
         
+    def resolve(self, job):
+        '''
+        returns job, which may be an hbJob or a dictionary, as an hbJob 
+        with this manager's defaults filled in
+        '''
+        if isinstance( job, hbJob ) == False:
+            job = hbJob.fromDict( job )
+            
+        return job.resolve( { 'source': self.source, 'destination': self.destination, 'backup': self.backup, 
+                              'trash': self.trash, 'json': self.json, 'preset': self.preset, 
+                              'guiPreset': self.guiPreset, 'params': self.params } )
+        
+    def enqueue(self, job):
+        '''
+        adds a job (an hbJob or a dictionary) to the queue, recording it in 
+        the journal.  Returns the hbJob, with the manager's defaults filled in.
+        
+        If jobs are taken shortest first, and the job doesn't say how long
+        it is, it's ranked by its size for now, and handed to the prober 
+        to ask HandBrakeCLI.  See hbProber.
+        '''
+        job = self.resolve( job )
+        
+        if self.prober is not None and job.duration is None and job.size is None:
+            try:
+                job = job.replace( size=getsize( job.source + job.file ) )
+            except OSError:
+                pass
+                
+        if self.journal is not None:
+            self.journal.enqueue( job )
+        self.queue.append( job )
+        self.runReport.set( 'queued', self.queue.length() )
+        self.events.publish( events.QUEUED, job=job )
+        
+        if self.prober is not None and job.duration is None:
+            self.prober.submit( job )
+        
+        return job
+        
+    def moveJob(self, index, offset):
+        '''
+        moves the job at index up (negative offset) or down the queue, 
+        recording the new order in the journal.
+        '''
+        if self.queue.moveItem( index, offset ) == False:
+            return False
+        
+        jobs = self.queue.snapshot()
+        
+        if self.journal is not None:
+            self.journal.reorder( [ job['id'] for job in jobs ] )
+            
+        self.events.publish( events.REORDERED, job=jobs[index + offset], index=index, offset=offset )
+            
+        return True
+        
+    def busyWorkers(self):
+        '''
+        returns a list of the workers that currently have a job
+        '''
+        busy = []
+        for worker in self.workers:
+            if worker.isBusy():
+                busy.append( worker )
+        return busy
+    
+    def idleWorker(self):
+        '''
+        returns the first worker without a job, or None if they are all busy
+        '''
+        for worker in self.workers:
+            if worker.isBusy() == False:
+                return worker
+        return None
+    
+    def activeWorker(self):
+        '''
+        returns the first worker with a job, or None if nothing is being processed.
+        Used by the chyron, which only has room to show one file in detail.
+        '''
+        busy = self.busyWorkers()
+        if len( busy ) == 0:
+            return None
+        return busy[0]
+    
+    def reportWorkers(self):
+        '''
+        aggregates the files being worked on by all of the workers into runReport
+        '''
+        files = []
+        
+        for worker in self.workers:
+            target = worker.target.get()
+            if target is not None:
+                files.append( target )
+                
+        if len( files ) == 0:
+            first = None
+        else:
+            first = files[0]
+                
+        self.runReport.update( { 'queued': self.queue.length(), 'file': first, 'files': files, 'running': len( files ) } )
+        
+    def noticeState(self, runState):
+        '''
+        publishes a RUNSTATE event if runState isn't what it was last time
+        '''
+        if runState != self.noticed:
+            self.events.publish( events.RUNSTATE, state=runState, previous=self.noticed )
+            self.noticed = runState
+        
     def run(self):
         
+        self.noticed = WAITING
+        
         while True:
             
+            # cleared before we look at anything, so nothing that changes
+            # from here on can be missed
+            self.wakeup.clear()
+            
             runState = self.runState.get()
+            busy = len( self.busyWorkers() ) + self.post.pending()
+            
+            self.noticeState( runState )
             
             if runState == STOPPED:
                 break
             elif runState == STOPAFTER or runState == STOPPING:
-                # welcome to 'after'
-                self.runState.set( STOPPED )
-                break
+                # welcome to 'after', once everyone has finished up
+                if busy == 0:
+                    self.runState.set( STOPPED )
+                    self.noticeState( STOPPED )
+                    break
+                self.wakeup.wait()
+                continue
             elif runState == IDLEAFTER:
-                # welcome to 'after'
-                self.runState.set( IDLE )
-                sleep(0.25)
+                if busy == 0:
+                    # welcome to 'after'
+                    self.runState.set( IDLE )
+                    self.noticeState( IDLE )
+                self.wakeup.wait()
                 continue
             elif runState == IDLE:
-                sleep(0.25)
+                self.wakeup.wait()
                 continue
             elif runState == WAITING:
                 if self.queue.length() == 0 :
-                    sleep( 0.25 )
+                    self.wakeup.wait()
                     continue
                 else:
                     # what we were waiting for!
                     self.runState.set( RUNNING )
+                    self.noticeState( RUNNING )
             elif self.queue.length() == 0 :
                 # we're RUNNING But don't need to be anymore
-                self.runState.set(WAITING)
-                sleep( 0.25 )
+                if busy == 0:
+                    self.runState.set(WAITING)
+                    self.noticeState( WAITING )
+                self.wakeup.wait()
                 continue
             
             # if we've gotten this far, we are ready to process the next
-            # job in queue
+            # job in queue, if anyone is free to take it, and if the
+            # governor will let us
             
-            job = self.queue.pop(0)
-                
-            if 'source' in job:
-                source = job['source']
-            else:
-                source = self.source
-            if 'source' in job:
-                source = job['source']
-            else:
-                source = self.source
+            if self.governor is not None and self.governor.isThrottled():
+                self.wakeup.wait()
+                continue
+            
+            worker = self.idleWorker()
+            
+            if self.concurrency is not None and len( self.busyWorkers() ) >= self.concurrency.limit.get():
+                # the controller says that's enough for now
+                worker = None
+            
+            if worker is None:
+                self.wakeup.wait()
+                continue
+            
+            job = self.queue.pop()
+            
+            if job is None:
+                continue
+            
+            worker.assign( job )
+            
+            # end of main job loop 
+    
+
+class hbWorker(object):
+    '''
+    One slot in the hbQueueManager's pool.  Each worker converts one job 
+    at a time in its own thread, and has its own jobState and process, 
+    which mean the same things they used to mean for the queue manager 
+    as a whole.
+    
+    Settings that are not part of the job are read from the manager.
+    
+    The worker has its own wakeup event, set by changes to its jobState,
+    the manager's runState, the governor, or its HandBrakeCLI process.  
+    The manager's wakeup is set whenever the worker becomes free.
+    
+    A job the governor has throttled stays CONVERTING, even though its
+    process is suspended, so that it carries on by itself afterwards.
+    '''
+    
+    def __init__(self, manager:hbQueueManager, number):
+        self.manager = manager
+        self.number = number
+        
+        self.jobState = CrossThreadItem( WAITING )
+        self.target = CrossThreadItem( None )
+        self.busy = CrossThreadItem( False )
+        
+        self.wakeup = Event()
+        self.jobState.watch( self.wakeup )
+        manager.runState.watch( self.wakeup )
+        self.busy.watch( manager.wakeup )
+        
+        if manager.governor is not None:
+            manager.governor.throttled.watch( self.wakeup )
+        
+        self.process = None
+        self.tmpSubs = []
+        self.t = None
+        
+    def isBusy(self):
+        return self.busy.get()
+    
+    def assign(self, job):
+        '''
+        starts processing job in a new thread.  The worker is 
+        considered busy from this moment until the job is complete.
+        '''
+        self.busy.set( True )
+        self.t = Thread( target=self.run, args=[job] )
+        self.t.start()
+        
+    def run(self, job):
+        
+        if self.manager.journal is not None:
+            self.manager.journal.start( job )
+            
+        self.manager.events.publish( events.STARTED, job=job, worker=self.number )
+        
+        try:
+            self.convert( job )
+        except Exception as e:
+            # something other than HandBrake went wrong (a missing subtitle, 
+            # a missing HandBrakeCLI), and the job can't go on
+            self.abandon( job, e )
+        finally:
+            # we are now done with the job, one way or another
+            self.jobState.set(WAITING)
+            self.target.set( None )
+            self.process = None
+            self.busy.set( False )
+            self.manager.reportWorkers()
+        
+    def abandon(self, job:hbJob, e):
+        
+        manager = self.manager
+        
+        manager.debug( 'Converting ' + job.file + ' failed:\n' + format_exc() )
+        manager.runReport.increment( 'err' )
+        
+        if manager.journal is not None:
+            manager.journal.fail( job )
+            
+        manager.events.publish( events.FAILED, job=job, error=repr( e ) )
+        
+        if self.process is not None and self.process.poll() is None:
+            self.process.overkill()
+        
+        for leftover in self.tmpSubs + [ manager.tmp + job.target ]:
+            try:
+                filedelete( leftover )
+            except FileNotFoundError:
+                pass
+            
+        self.tmpSubs = []
+        
+    def convert(self, job:hbJob):
+        
+        manager = self.manager
+        source = job.source
+        
+        # the subtitles copied to tmp so far, for abandon() to clean up
+        self.tmpSubs = []
+            
+        if len( job.srts ) != 0 :
                 
-            if 'json' in job:
-                json = job['json']
-            else:
-                json = self.json
+            srts = []
+            
+            for i in range( 0, len( job.srts ) ):
                 
-            if 'params' in job:
-                params = job['params']
-            else:
-                params = self.params
+                # the worker number keeps workers from stepping on each other's subtitles
+                tmpsub = manager.tmp + str( self.number ) + '-' + str(i)            
                 
-            if 'preset' in job:
-                preset = job['preset']
-            else:
-                preset = self.preset 
+                r = re.split( '(\....)\.srt$', job.srts[i] )
                 
-            if 'guiPreset' in job:
-                guiPreset = job['guiPreset']
-            else:
-                guiPreset = self.guiPreset
+                if len( r ) > 1:
+                    tmpsub += r[1]
+                    
+                tmpsub += ".srt"
                 
-            if 'destination' in job:
-                destination = job['destination']
-            else:
-                destination = self.destination
+                filecopy( source + job.srts[i], tmpsub )
+                srts.append( tmpsub )
+                self.tmpSubs.append( tmpsub )
                 
-            if 'srts' in job and len(job['srts']) != 0 :
-                    
-                srts = []
+        else:
                 
-                for i in range( 0, len( job['srts'] ) ):
-                    
-                    tmpsub = self.tmp + str(i)            
-                    
-                    r = re.split( '(\....)\.srt$', job['srts'][i] )
-                    
-                    if len( r ) > 1:
-                        tmpsub += r[1]
-                        
-                    tmpsub += ".srt"
-                    
-                    filecopy( source + job['srts'][i], tmpsub )
-                    srts.append( tmpsub )
-                    
-            else:
+            srts = False
+        
+        if manager.engine is None:
+            self.process = hbProcess( source + job.file, manager.tmp + job.target, srts, job.preset, job.guiPreset, job.json, job.params, 
+                                      manager.cli, manager.log, manager.sublang, manager.jsonProgress, manager.supervisor, 
+                                      self.progressReporter( job ) )
+        else:
+            self.process = hbAsyncProcess( source + job.file, manager.tmp + job.target, srts, job.preset, job.guiPreset, job.json, job.params, 
+                                           manager.cli, manager.log, manager.sublang, manager.engine, manager.jsonProgress,
+                                           self.progressReporter( job ) )
+        self.target.set( job.target )
+        manager.reportWorkers()
+        self.jobState.set(CONVERTING)
+        self.process.watch( self.wakeup )
                     
-                srts = False
+        while True:
             
-            self.process = hbProcess( source + job['file'], self.tmp + job['target'], srts, preset, guiPreset, json, params, self.cli, self.log, self.sublang )
-            self.runReport.update( { 'queued': self.queue.length(), 'file': job['target'] })
-            self.jobState.set(CONVERTING)
-                        
-            while self.process.isProcessing():
-                
-                # really the only thing we need to do here is check and see if the runstate or jobstate has been changed
-                # to a state requiring action.  Otherwise we just wait for HandBrake to do its thing.
+            self.wakeup.clear()
+            
+            if self.process.isProcessing() == False:
+                break
+            
+            # really the only thing we need to do here is check and see if the runstate or jobstate has been changed
+            # to a state requiring action.  Otherwise we just wait for HandBrake to do its thing.
+            
+            if manager.runState.get() == STOPPING:
                 
-                if self.runState.get() == STOPPING:
+                if self.process.poll() is None:
+                    self.process.overkill()
                     
-                    if self.process.poll() is not None:
-                        self.process.murder()
-                        sleep(0.25)
-                        continue
-                    else:
-                        break
+                # the process will wake us when it's done
+                self.wakeup.wait()
+                continue
 
-                jobState = self.jobState.get()
-                
-                if jobState == SUSPENDED:
-                    
-                    if self.process.isSuspended()== False:
-                        self.process.suspend()
-                        
-                    sleep(0.25)
-                    continue
+            jobState = self.jobState.get()
+            throttled = manager.governor is not None and manager.governor.isThrottled()
+            
+            if jobState == SUSPENDED or ( jobState == CONVERTING and throttled ):
                 
-                if jobState == CONVERTING:
-                    
-                    if self.process.isSuspended():
-                        self.process.resume()
-                        sleep(0.25)
-                        continue
-                 
-                sleep( 0.25 )
-                    
-                # end of handbrake process loop
+                if self.process.isSuspended()== False:
+                    self.process.suspend()
+            
+            elif jobState == CONVERTING:
                 
-            if self.process.data.get( 'success' ) == False:
+                if self.process.isSuspended():
+                    self.process.resume()
+             
+            self.wakeup.wait()
                 
-                # the job did not complete successfully.
+            # end of handbrake process loop
+            
+        self.process.unwatch( self.wakeup )
+            
+        if self.process.data.get( 'success' ) == False:
+            
+            # the job did not complete successfully.
+            
+            if manager.runState.get() != STOPPING:
+                # looks like handbrake itself failed
+                manager.runReport.increment( 'err' )
+                self.process.writeOutputLog( job.file )
                 
-                if self.runState != STOPPING:
-                    # looks like handbrake itself failed
-                    self.runReport.set( 'err', self.runReport.get('err') + 1 )
-                    self.process.writeOutputLog(job['file'])
-                    self.jobState.set(CLEANUP)
-                    filedelete( self.tmp + job['target'] )
-                else:
-                    # oh, we MEANT to do that
-                    self.runState.set(STOPPED)
-                    # we'll break at the beginning of the next loop
-                    # but stick around here for cleanup
+                if manager.journal is not None:
+                    manager.journal.fail( job )
                     
+                manager.events.publish( events.FAILED, job=job, error='HandBrakeCLI failed' )
             else:
-                self.runReport.set( 'done', self.runReport.get('done') + 1 )
+                self.process.discardOutputLog()
+            
+            # if we were stopping, we MEANT to do that, and the manager
+            # will take care of STOPPED once all of the workers are done
+            
+            self.jobState.set(CLEANUP)
+            
+            try:
+                filedelete( manager.tmp + job.target )
+            except FileNotFoundError:
+                pass
                 
-                self.jobState.set( MOVING )
-                    
-                try:
-                    filerename( self.tmp + job['target'], destination + job['target'] )
-                except:
-                    filemove( self.tmp + job['target'], destination + job['target'] )
-                    
-                if 'backup' in job:
-                    backup = job['backup']
-                else:
-                    backup = self.backup
-                    
-                if backup is not None:                        
-                    self.jobState.set( BACKINGUP )  
-                    filecopy( destination + job['target'], job['backup'] + job['target'] )
-                    
-                self.jobState.set(CLEANUP)
-                    
-                if 'trash' in job:
-                    trash = job['trash']
-                else:
-                    trash = self.trash 
-                    
-                if trash is not None:
-                    try:
-                        filerename( source + job['file'], trash + job['file'] )
-                    except:
-                        filemove( source + job['file'], trash + job['file'] )
-                              
             # cleanup temporary srts
             
             if srts != False :
                 for srt in srts:
                     filedelete(srt)
-                    
-            # we are now done with the job, one way or another
+                
+        else:
+            # counted as done by the post-processor, once the files are where they belong
+            self.process.discardOutputLog()
             
-            self.jobState.set(WAITING)
-            self.runReport.set( 'file', None )
-            self.process = None
+            # the rest is just moving files around, which can take a while,
+            # so it's left to the post-processor while we get on with the next job
+                
+            manager.events.publish( events.CONVERTED, job=job, worker=self.number )
             
-            # end of main job loop 
-        
\ No newline at end of file
+            manager.post.submit( { 'job': job, 'tmp': manager.tmp, 'source': source, 'destination': job.destination, 
+                                   'backup': job.backup, 'trash': job.trash, 'srts': srts } )
+            
+            # they're the post-processor's now
+            self.tmpSubs = []
+            
+    def progressReporter(self, job):
+        '''
+        returns a function for the process to call with each progress report
+        '''
+        def report(report):
+            self.manager.events.publish( events.PROGRESS, job=job, worker=self.number, report=report )
+        return report
@@ -0,0 +1,95 @@
+'''
+Created on Feb 20, 2023
+
+@author: Cather Steincamp
+'''
+from lib.JobStore import JobStore
+
+'''
+Policies
+
+    FIFO
+        First come, first served.
+    PRIORITY
+        Highest job['priority'] first (default 0), first come first 
+        served among equals.
+    SHORTEST
+        Shortest job first, by duration x width x height, as found by
+        hbProbe().  Jobs that couldn't be probed are ranked by job['size'], 
+        their size in bytes, and failing that, go first.
+    ROUNDROBIN
+        One job from each show in turn.  The show is job['show'], or if 
+        that's not set, job['destination'], since each show usually has 
+        a folder of its own.
+'''
+
+FIFO, PRIORITY, SHORTEST, ROUNDROBIN = 'fifo', 'priority', 'shortest', 'roundrobin'
+
+POLICIES = [ FIFO, PRIORITY, SHORTEST, ROUNDROBIN ]
+
+def jobCost(job:dict):
+    '''
+    how much work a job is, for SHORTEST.  Only useful for comparing jobs.
+    '''
+    if 'duration' in job and 'width' in job and 'height' in job:
+        return job['duration'] * job['width'] * job['height']
+    return job.get( 'size', 0 )
+
+class hbScheduler(JobStore):
+    '''
+    The queue of jobs waiting for a worker.  It's a lib.JobStore, so the 
+    next job can be found, added, or taken in O(log n), however long the 
+    queue gets, whatever the policy, and any job can be found by its id.
+    
+    Each job is filed under a key worked out from the policy when it's 
+    added.  A job that's moved with moveItem() takes on the key of the
+    job it was moved next to, so moves stick even with a policy.
+    
+        policy
+            default FIFO.  See above.
+        jobs
+            default None
+            a list of jobs to start with, as if append()ed in order
+    '''
+
+    def __init__(self, policy=FIFO, jobs:list=None):
+        
+        if policy not in POLICIES:
+            raise ValueError( 'Unknown scheduling policy: ' + str( policy ) )
+        
+        self.policy = policy
+        
+        # for ROUNDROBIN: the turn each show is up to, and the turn being served 
+        self.turns = {}
+        self.turn = 0
+        
+        JobStore.__init__(self, jobs)
+                
+    def key(self, job:dict, seq):
+        
+        if self.policy == PRIORITY:
+            return ( -job.get( 'priority', 0 ), seq )
+        
+        if self.policy == SHORTEST:
+            return ( jobCost( job ), seq )
+        
+        if self.policy == ROUNDROBIN:
+            show = job.get( 'show', job.get( 'destination' ) )
+            # a show that's been out of the queue for a while doesn't 
+            # get to catch up on the turns it missed
+            turn = max( self.turns.get( show, 0 ), self.turn )
+            self.turns[show] = turn + 1
+            return ( turn, seq )
+        
+        return ( seq, )
+    
+    def rekey(self, entry, job:dict):
+        # for SHORTEST, a job that's been probed since it was added
+        # has to be filed again under what it's really going to cost
+        if self.policy == SHORTEST:
+            return ( jobCost( job ), entry[1] )
+        return entry[0]
+    
+    def taken(self, entry):
+        if self.policy == ROUNDROBIN:
+            self.turn = entry[0][0]
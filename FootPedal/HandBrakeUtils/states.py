@@ -0,0 +1,64 @@
+'''
+Created on Feb 14, 2023
+
+@author: Cather Steincamp
+
+The states used by hbQueueManager, its workers, and its post-processor.
+These are all available from HandBrakeUtils.queueManager as well.
+'''
+
+''' 
+Queue States
+
+    WAITING
+        No jobs to convert.  Will convert if jobs are added.
+    RUNNING
+        Processing, and will continue to process until all items are complete,
+        then change to WAITING
+    IDLE
+        Not currently processing, although there are jobs in the queue.
+        Will start again when you tell it.
+    IDLEAFTER
+        Processing, but after this item is complete, will change
+        to IDLE
+    STOPAFTER
+        Processing, but after this item is complete, will change
+        to STOPPED
+    STOPPING
+        In the process of cancelling a job and cleaning up, then
+        will change to STOPPED
+    STOPPED
+        No longer processing; expecting app shutdown
+'''
+
+WAITING, RUNNING, IDLE, IDLEAFTER, STOPAFTER, STOPPING, STOPPED = 0,1,2,3,4,5,6
+
+'''
+Item States
+
+    WAITING (variable does double duty)
+        No item currently being processed.
+        Handbrake CLI is not running.
+    CONVERTING
+        HandBrakeCLI is currently processing the item.
+    SUSPENDED
+        HandBrakeCLI has been suspended.
+    
+    The following states belong to the post-processor, which looks after
+    each file once HandBrakeCLI is through with it, so that the worker
+    can get on with the next job.
+    
+    MOVING
+        HandBrakeCLI has completed.
+        The file is complete and being moved to its final destination
+    BACKINGUP
+        HandBrakeCLI has completed.
+        The file is being backed up to a second destination
+    CLEANUP
+        HandBrakeCLI has completed.
+        any temporary subtitles being deleted
+        original files being moved to trash folder   
+        
+'''
+
+CONVERTING, SUSPENDED, MOVING, BACKINGUP, CLEANUP = 1,2,3,4,5
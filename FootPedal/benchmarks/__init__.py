@@ -0,0 +1,7 @@
+'''
+Stand-alone benchmarks.  Each module can be run from the project folder with
+
+    python -m benchmarks.<module> [arguments]
+
+and prints its results to the console.
+'''
@@ -0,0 +1,108 @@
+'''
+Created on Feb 23, 2023
+
+@author: Cather Steincamp
+
+Measures how many times a second a progress report can be read by 1 to 16
+threads at once, while another thread keeps writing to it, for 
+CrossThreadDict and FrozenCrossThreadDict.
+
+    python -m benchmarks.crossThreaders [--seconds N] [--writes N]
+
+Each read is a copy() of the whole report, as the chyron does, plus a get()
+of one item.  --seconds is how long each run lasts (default 1), and 
+--writes how many updates per second the writer makes (default 100, which
+is a good deal more than HandBrakeCLI reports).
+
+The writer keeps to a fixed schedule, catching up if it falls behind, so 
+that both kinds of dict are read under the same amount of writing.  Reads 
+per write are printed too.  If the readers starve the writer so badly it 
+can't keep up anyway, the run is marked with a *, and those figures aren't 
+comparable with the rest; try fewer --writes.
+'''
+
+import sys
+from threading import Thread, Event, Barrier
+from time import perf_counter, sleep
+from lib.CrossThreaders import CrossThreadDict, FrozenCrossThreadDict
+
+READERS = [ 1, 2, 4, 8, 16 ]
+
+def sampleReport():
+    return { 'task': '1', 'taskTotal': '1', '%': '45.23%', 'fpsNow': '120.45', 'fpsAvg': '118.22', 
+             'eta': 'ETA 00:05:12', 'success': False, 'start': 0.0 }
+
+def writer(report, stop, writes, ready):
+    ready.wait()
+    start = perf_counter()
+    i = 0
+    while stop.is_set() == False:
+        i += 1
+        report.update( { '%': '{:.2f}%'.format( i % 10000 / 100 ), 'fpsNow': str( 100 + i % 50 ) } )
+        
+        # sleep until the next write is due, not for a fixed interval, so
+        # that time spent waiting on the lock doesn't slow the schedule down
+        wait = start + i / writes - perf_counter()
+        if wait > 0:
+            sleep( wait )
+
+def reader(report, stop, counts, index, ready):
+    ready.wait()
+    reads = 0
+    while stop.is_set() == False:
+        report.copy()
+        report.get( '%' )
+        reads += 1
+    counts[index] = reads
+
+def measure(kind, readers, seconds, writes):
+    report = kind( sampleReport() )
+    stop = Event()
+    counts = [ 0 ] * readers
+    
+    # everyone waits here until every thread has started, so that starting
+    # them isn't part of what's measured
+    ready = Barrier( readers + 2 )
+    
+    threads = [ Thread( target=writer, args=[report, stop, writes, ready] ) ]
+    for i in range( 0, readers ):
+        threads.append( Thread( target=reader, args=[report, stop, counts, i, ready] ) )
+    
+    for t in threads:
+        t.start()
+    ready.wait()
+    start = perf_counter()
+    sleep( seconds )
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = perf_counter() - start
+    
+    return sum( counts ) / elapsed, report.version / elapsed
+
+def describe(reads, written, writes):
+    short = '*' if written < writes * 0.9 else ' '
+    return '{:>12,.0f} {:>8,.0f}{}'.format( reads, reads / max( written, 1 ), short )
+
+if __name__ == '__main__':
+    
+    args = sys.argv[1:]
+    seconds = 1.0
+    writes = 100
+    
+    if '--seconds' in args:
+        i = args.index( '--seconds' )
+        seconds = float( args[i+1] )
+        del args[i:i+2]
+        
+    if '--writes' in args:
+        i = args.index( '--writes' )
+        writes = int( args[i+1] )
+        del args[i:i+2]
+        
+    print( 'readers        CrossThreadDict     FrozenCrossThreadDict   (reads/second, reads/write)' )
+    
+    for readers in READERS:
+        locked, lockedWrites = measure( CrossThreadDict, readers, seconds, writes )
+        frozen, frozenWrites = measure( FrozenCrossThreadDict, readers, seconds, writes )
+        print( '{:>7}  {}  {}'.format( readers, describe( locked, lockedWrites, writes ), describe( frozen, frozenWrites, writes ) ) )
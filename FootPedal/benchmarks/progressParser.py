@@ -0,0 +1,131 @@
+'''
+Created on Feb 6, 2023
+
+@author: Cather Steincamp
+
+Measures how many lines of HandBrake output per second can be parsed by
+HandBrakeUtils.process.parseProgress(), next to the regex cascade it replaced.
+
+    python -m benchmarks.progressParser [logfile ...] [--repeat N]
+
+The log files are transcripts of HandBrake output, like the ones written
+for failed jobs.  If none are given, a made-up encode is used instead.
+'''
+
+import re
+import sys
+from time import perf_counter
+from HandBrakeUtils.process import parseProgress
+
+def legacyParse(output):
+    # the old hbOutput.processOutput(), minus the sleep(0.05) per line
+
+    report={}
+
+    r = re.split( 'ask (\\d) of (\\d)', output )
+
+    if len( r ) > 1:
+        report['task'] = r[1]
+        report['taskTotal'] = r[2]
+    else:
+        report['task'] = ''
+        report['taskTotal'] = ''
+
+    r = re.split( ' (\\d{1,2}\\.\\d\\d) \\%', output )
+
+    if len( r ) > 1:
+        report['%'] = r[1] + '%'
+    else:
+        report['%'] = ''
+
+    r = re.split( '\\((.*) fps. avg (.*) fps', output )
+
+    if len( r ) > 1 :
+        report['fpsNow'] = r[1]
+        report['fpsAvg'] = r[2]
+    else:
+        report['fpsNow'] = ''
+        report['fpsAvg'] = ''
+
+    r = re.split( 'ETA (..)h(..)m(..)s', output )
+
+    if len( r ) > 1 :
+        report['eta'] = 'ETA ' + r[1] + ':' + r[2] + ':' + r[3]
+    elif len( re.split( '(mux\\: track|Muxing \\:)', output ) ) > 1:
+        report['eta'] = '   Muxing...'
+    else:
+        report['eta'] = ''
+
+    if len( re.split( 'Encode done\\!|Finished work', output ) ) > 1:
+        report['success'] = True
+
+    return report
+
+def sampleLog():
+    lines = [ '[12:00:00] hb_init: starting libhb thread',
+              '[12:00:00] scan: decoding previews for title 1',
+              '[12:00:01] scan: audio 0x1: aac, rate=48000Hz, bitrate=1 eng' ]
+
+    for i in range( 0, 10000 ):
+        lines.append( 'Encoding: task 1 of 1, %.2f %% (%.2f fps, avg %.2f fps, ETA 00h%02dm%02ds)'
+                      % ( i / 100, 100 + i % 50, 110.5, ( 10000 - i ) // 600, ( 10000 - i ) // 10 % 60 ) )
+
+    for i in range( 0, 200 ):
+        lines.append( '[12:20:00] mux: track %d, %d frames, %d bytes' % ( i % 3, i * 1000, i * 300000 ) )
+
+    lines.append( 'Encode done!' )
+
+    return lines
+
+def loadLogs(filenames):
+    lines = []
+    for filename in filenames:
+        f = open( filename, 'r', errors='replace' )
+        for line in f.read().replace( '\r', '\n' ).split( '\n' ):
+            if len( line.rstrip() ) > 0:
+                lines.append( line.rstrip() )
+        f.close()
+    return lines
+
+def measure(parser, lines, repeat):
+    best = None
+    for i in range( 0, repeat ):
+        start = perf_counter()
+        for line in lines:
+            parser( line )
+        elapsed = perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return len( lines ) / best
+
+if __name__ == '__main__':
+
+    args = sys.argv[1:]
+    repeat = 5
+
+    if '--repeat' in args:
+        i = args.index( '--repeat' )
+        repeat = int( args[i+1] )
+        del args[i:i+2]
+
+    if len( args ) == 0:
+        lines = sampleLog()
+        source = 'sample encode'
+    else:
+        lines = loadLogs( args )
+        source = ', '.join( args )
+
+    mismatches = 0
+    for line in lines:
+        if parseProgress( line ) != legacyParse( line ):
+            mismatches += 1
+
+    print( str( len( lines ) ) + ' lines from ' + source )
+    print( 'lines where the parsers disagree: ' + str( mismatches ) )
+
+    legacy = measure( legacyParse, lines, repeat )
+    single = measure( parseProgress, lines, repeat )
+
+    print( 'regex cascade:      {:>12,.0f} lines/second'.format( legacy ) )
+    print( 'single pass:        {:>12,.0f} lines/second'.format( single ) )
+    print( 'cascade with sleep: {:>12,.0f} lines/second'.format( 1 / ( 1 / legacy + 0.05 ) ) )
@@ -0,0 +1,114 @@
+'''
+Created on Feb 26, 2023
+
+@author: Cather Steincamp
+
+Measures how long lib.ShowLookup.TVShow takes to load a show with 10, 50
+and 200 seasons, fetching the seasons one at a time and side by side.
+
+    python -m benchmarks.tvdb [--latency MS] [--workers N]
+
+Nothing leaves the machine.  A mock TVDB is served on localhost, which
+waits --latency milliseconds (default 50) before answering each request,
+about what a round trip to the real thing costs.  TVShow talks to it 
+through a client of our own with the same methods as tvdb_v4_official.TVDB.
+--workers is how many seasons are fetched at once (default 
+lib.ShowLookup.WORKERS).
+'''
+
+import sys
+import json
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+from time import perf_counter, sleep
+from urllib.request import urlopen
+from lib.ShowLookup import TVShow, WORKERS, AIRED, DVD, ABSOLUTE, ALTERNATE
+
+SEASONS = [ 10, 50, 200 ]
+EPISODES = 20
+
+class MockTVDB(BaseHTTPRequestHandler):
+    '''
+    /series/<seasons>/extended describes a show with that many seasons, 
+    spread across the four orders, and /seasons/<id>/extended lists its 
+    episodes.
+    '''
+    
+    latency = 0.05
+    
+    def do_GET(self):
+        sleep( self.latency )
+        
+        parts = self.path.strip( '/' ).split( '/' )
+        
+        if parts[0] == 'series':
+            count = int( parts[1] )
+            orders = [ AIRED, DVD, ABSOLUTE, ALTERNATE ]
+            seasons = [ { 'id': i, 'number': i // 4 + 1, 'type': { 'id': orders[i % 4] } } for i in range( 0, count ) ]
+            data = { 'name': 'Show with ' + str( count ) + ' seasons', 'seasons': seasons }
+        else:
+            seasonId = int( parts[1] )
+            data = { 'episodes': [ { 'number': e, 'name': 'Episode ' + str( seasonId ) + ':' + str( e ) } for e in range( 1, EPISODES + 1 ) ] }
+        
+        body = json.dumps( { 'data': data } ).encode()
+        self.send_response( 200 )
+        self.send_header( 'Content-Type', 'application/json' )
+        self.send_header( 'Content-Length', str( len( body ) ) )
+        self.end_headers()
+        self.wfile.write( body )
+        
+    def log_message(self, *args):
+        pass
+
+class MockClient(object):
+    
+    def __init__(self, url):
+        self.url = url
+    
+    def get(self, path):
+        return json.loads( urlopen( self.url + path ).read() )['data']
+    
+    def get_series_extended(self, series_id):
+        return self.get( '/series/' + str( series_id ) + '/extended' )
+    
+    def get_season_extended(self, season_id):
+        return self.get( '/seasons/' + str( season_id ) + '/extended' )
+
+def measure(client, seasons, workers):
+    start = perf_counter()
+    show = TVShow( seasons, '', '', client=client, workers=workers )
+    elapsed = perf_counter() - start
+    if show.name == False:
+        raise RuntimeError( 'the mock server could not be reached' )
+    return elapsed
+
+if __name__ == '__main__':
+    
+    args = sys.argv[1:]
+    workers = WORKERS
+    
+    if '--latency' in args:
+        i = args.index( '--latency' )
+        MockTVDB.latency = float( args[i+1] ) / 1000
+        del args[i:i+2]
+        
+    if '--workers' in args:
+        i = args.index( '--workers' )
+        workers = int( args[i+1] )
+        del args[i:i+2]
+    
+    server = ThreadingHTTPServer( ( '127.0.0.1', 0 ), MockTVDB )
+    server.daemon_threads = True
+    Thread( target=server.serve_forever, daemon=True ).start()
+    
+    client = MockClient( 'http://127.0.0.1:' + str( server.server_address[1] ) )
+    
+    print( '{:.0f} ms per request, {} workers'.format( MockTVDB.latency * 1000, workers ) )
+    print( 'seasons    one at a time    side by side    speedup' )
+    
+    for seasons in SEASONS:
+        serial = measure( client, seasons, 1 )
+        parallel = measure( client, seasons, workers )
+        print( '{:>7}  {:>13.2f} s  {:>12.2f} s  {:>8.1f}x'.format( seasons, serial, parallel, serial / parallel ) )
+    
+    server.shutdown()
@@ -0,0 +1,196 @@
+'''
+Created on Feb 2, 2023
+
+@author: Cather Steincamp
+
+    Awatch is the asyncio counterpart of Pwatch.  Rather than giving each
+    process its own monitoring thread (or two), every Awatch attached to the
+    same AsyncEngine is supervised by a single event loop running in a single
+    thread, which makes it much cheaper to run many processes at once.
+
+    It offers the same surface as Pwatch, so the two are interchangeable as far
+    as the code using them is concerned:
+
+        suspend()
+        resume()
+        overkill()
+        isProcessing()
+        isSuspended()
+        watch( event )
+        unwatch( event )
+        poll()
+        wait( timeout )
+        processOutput( output )
+        processError( error )
+
+    See Pwatch for what each of these does.  As with Pwatch, processOutput() and
+    processError() are empty and there for the use of child classes.  Note that
+    they are called from the engine's thread, so they must not block, or every
+    process on the engine will wait for them.
+
+    The constructor takes the arguments for the process, the AsyncEngine that
+    will supervise it, and the same stderr, text, and other keyword arguments
+    that asyncio.create_subprocess_exec() accepts.  stdout is fixed as PIPE.
+
+    AsyncEngine
+
+        Owns the event loop and the thread it runs in.  One engine can supervise
+        any number of processes.
+
+        submit( coroutine )
+                    schedules the coroutine on the engine's loop, and returns a
+                    concurrent.futures.Future for the result.
+        stop()
+                    stops the loop.  Anything still running is abandoned.
+'''
+
+import asyncio
+import os, warnings
+from asyncio.subprocess import PIPE, STDOUT
+from threading import Thread, Lock
+from psutil import Process
+from lib.FrameReader import FrameReader
+
+# how much to read from a pipe at a time
+CHUNKSIZE = 65536
+
+class AsyncEngine(object):
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.t = Thread( target=self.run, daemon=True )
+        self.t.start()
+
+    def run(self):
+        asyncio.set_event_loop( self.loop )
+        self.watchChildren()
+        self.loop.run_forever()
+
+    def watchChildren(self):
+        # By default, asyncio waits on each child process with a thread of
+        # its own, which is exactly what we're trying to avoid.  Where the
+        # OS supports it (Linux 5.3 and up), a pidfd lets the loop do it.
+        if hasattr( asyncio, 'PidfdChildWatcher' ) and hasattr( os, 'pidfd_open' ):
+            try:
+                os.close( os.pidfd_open( os.getpid() ) )
+            except OSError:
+                return
+            with warnings.catch_warnings():
+                warnings.simplefilter( 'ignore', DeprecationWarning )
+                watcher = asyncio.PidfdChildWatcher()
+                watcher.attach_loop( self.loop )
+                asyncio.set_child_watcher( watcher )
+
+    def submit(self, coroutine):
+        return asyncio.run_coroutine_threadsafe( coroutine, self.loop )
+
+    def stop(self):
+        self.loop.call_soon_threadsafe( self.loop.stop )
+
+class Awatch(object):
+
+    def __init__(self, args, engine:AsyncEngine, stderr=STDOUT, text=False, **kwargs ):
+
+        if 'stdout' in kwargs:
+            del kwargs['stdout']
+
+        self.args = args
+        self.engine = engine
+        self.text = text
+        self.errHandling = stderr
+        self.processing = True
+        self.suspended = False
+        self.runlock = Lock()
+        self.watchers = []
+
+        # wait for the process to start, so that a missing executable
+        # raises here just as it would with Popen
+
+        self.proc = engine.submit( self.start( stderr, kwargs ) ).result()
+        self.pid = self.proc.pid
+        self.process = Process( self.pid )
+
+        self.task = engine.submit( self.monitor() )
+
+    async def start(self, stderr, kwargs):
+        return await asyncio.create_subprocess_exec( *self.args, stdout=PIPE, stderr=stderr, **kwargs )
+
+    def suspend(self):
+        with self.runlock:
+            if self.suspended == False and self.poll() is None:
+                self.process.suspend()
+                self.suspended = True
+
+    def resume(self):
+        with self.runlock:
+            if self.suspended:
+                self.process.resume()
+                self.suspended = False
+
+    def overkill(self):
+        self.process.kill()
+
+    def isProcessing(self):
+        with self.runlock:
+            return self.processing
+
+    def isSuspended(self):
+        with self.runlock:
+            return self.suspended
+
+    def watch(self, event):
+        with self.runlock:
+            self.watchers.append( event )
+            if self.processing == False:
+                event.set()
+
+    def unwatch(self, event):
+        with self.runlock:
+            if event in self.watchers:
+                self.watchers.remove( event )
+
+    def poll(self):
+        return self.proc.returncode
+
+    def wait(self, timeout=None):
+        self.task.result( timeout )
+        return self.proc.returncode
+
+    async def monitor(self):
+
+        readers = [ self.readStream( self.proc.stdout, self.processOutput ) ]
+
+        if self.errHandling == PIPE:
+            readers.append( self.readStream( self.proc.stderr, self.processError ) )
+
+        try:
+            await asyncio.gather( *readers )
+            await self.proc.wait()
+        finally:
+            with self.runlock:
+                self.processing = False
+                for event in self.watchers:
+                    event.set()
+
+    async def readStream(self, stream, handler):
+
+        # split on carriage returns as well as newlines; see lib.FrameReader
+        reader = FrameReader( self.text )
+
+        while True:
+            data = await stream.read( CHUNKSIZE )
+
+            if len( data ) == 0:
+                # end of file; the process has closed the pipe
+                break
+
+            for frame in reader.feed( data ):
+                handler( frame )
+
+        for frame in reader.flush():
+            handler( frame )
+
+    def processOutput(self, output ):
+        pass
+    def processError(self, error ):
+        pass
@@ -7,18 +7,71 @@ These objects encapsulate and secure individual items, threads, or dictionaries.
 if a list or dictionary is passed to these items, or read from (not removed), it
 will be copied, rather than passed by reference.
 
+Any number of threading.Event objects can be registered with watch().  All 
+of them are set whenever the contents change, so a thread can wait() for 
+something to happen rather than checking back every so often.  Clear the 
+event before looking at the contents, not after, or a change can slip by.
+
+Each of them also has a version, which goes up by one every time the 
+contents change.  A thread that only cares about one of them can hang on 
+to the version it last saw, and skip copying (or redrawing) anything until 
+it's different, or block until it is:
+
+    version = item.waitChanged( version, timeout )
+    
+waitChanged() returns as soon as the version isn't since, or when timeout 
+(in seconds, or None to wait forever) runs out, and returns the version.
+
+FrozenCrossThreadItem, FrozenCrossThreadDict, and FrozenCrossThreadList 
+work the other way around.  Nothing they hold is ever changed: every change 
+builds a new tuple or dictionary, and swaps it in.  Lists and dictionaries 
+passed to them are frozen (into tuples and MappingProxyTypes), and what's 
+read from them is handed out as is, so reading doesn't take the lock or 
+copy anything.  They're for things that are read far more often than 
+they're written, like progress reports; writing costs a copy of the whole 
+thing.  What comes out of them can't be changed, so code that wants to 
+change it has to copy it first.
+
 '''
 
-from threading import Lock
+from threading import Condition, Lock
+from types import MappingProxyType
 
 class CrossThreader(object):
     def __init__(self):
-        self.lock=Lock()
+        # a Condition works just like a Lock in a with statement
+        self.lock=Condition( Lock() )
+        self.watchers=[]
+        self.version=0
+    def watch(self, event):
+        with self.lock:
+            self.watchers.append( event )
+    def unwatch(self, event):
+        with self.lock:
+            if event in self.watchers:
+                self.watchers.remove( event )
+    def notify(self):
+        # called by the methods below while they hold the lock
+        self.version += 1
+        self.lock.notify_all()
+        for event in self.watchers:
+            event.set()
+    def waitChanged(self, since, timeout=None):
+        with self.lock:
+            self.lock.wait_for( lambda: self.version != since, timeout )
+            return self.version
     def copyIfNeeded(self, item):
         if type(item) == list or type( item ) == dict:
             return item.copy()
         else:
             return item
+    def freeze(self, item):
+        if type( item ) == list:
+            return tuple( item )
+        elif type( item ) == dict:
+            return MappingProxyType( item.copy() )
+        else:
+            return item
 
 class CrossThreadItem(CrossThreader):
     '''
@@ -35,11 +88,11 @@ class CrossThreadItem(CrossThreader):
     def set(self, item):
         with self.lock:
             self.item = self.copyIfNeeded( item )
+            self.notify()
             
 class CrossThreadDict(CrossThreader):
     def __init__(self, d:dict=None):
         CrossThreader.__init__(self)
-        self.lock = Lock()
         if d is None: 
             self.d = {}
         else:
@@ -55,18 +108,43 @@ class CrossThreadDict(CrossThreader):
     def set(self, key, v):
         with self.lock:
             self.d[key] = self.copyIfNeeded( v )
+            self.notify()
             
     def copy(self):
         with self.lock:
             return self.d.copy()
         
+    def pop(self, key):
+        with self.lock:
+            if key in self.d:
+                r = self.d.pop( key )
+                self.notify()
+                return r
+            else:
+                return False
+            
+    def length(self):
+        with self.lock:
+            return len( self.d )
+        
     def replace(self, d:dict ):
         with self.lock:
             self.d = d.copy()
+            self.notify()
         
     def update(self, d:dict ):
         with self.lock:
             self.d.update(d)
+            self.notify()
+            
+    def increment(self, key, amount=1):
+        with self.lock:
+            if key in self.d:
+                self.d[key] += amount
+            else:
+                self.d[key] = amount
+            self.notify()
+            return self.d[key]
     
 class CrossThreadList(CrossThreader):
     def __init__(self, l=None):
@@ -77,12 +155,15 @@ class CrossThreadList(CrossThreader):
             self.l = self.copyIfNeeded( l )
                 
     def append(self, addition:list):
+        addition = addition.copy()
         with self.lock:
-            self.l.append( addition.copy() )
+            self.l.append( addition )
+            self.notify()
                                 
     def clear(self):
         with self.lock:
             self.l.clear()
+            self.notify()
             
     def copy(self):
         with self.lock:
@@ -93,8 +174,10 @@ class CrossThreadList(CrossThreader):
             return len( self.l )
                 
     def extend(self, addition:list):
+        addition = addition.copy()
         with self.lock:
-            self.l.extend( addition.copy() )
+            self.l.extend( addition )
+            self.notify()
             
     def index(self, value):
         with self.lock:
@@ -103,11 +186,13 @@ class CrossThreadList(CrossThreader):
     def insert(self, index, insertion):
         with self.lock:
             self.l.insert( index, self.copyIfNeeded( insertion ) )
+            self.notify()
     
     def pop(self, index):   
         with self.lock:
             if len( self.l ) > index :
                 r = self.l.pop(index)
+                self.notify()
             else:
                 r = None       
         return r
@@ -116,14 +201,17 @@ class CrossThreadList(CrossThreader):
         with self.lock:
             if i in self.l:
                 self.l.remove(i)
+                self.notify()
     
     def reverse(self):
         with self.lock:
-            self.l = self.l.reverse()
+            self.l.reverse()
+            self.notify()
             
     def sort(self):
         with self.lock:
-            self.l = self.l.sort()
+            self.l.sort()
+            self.notify()
             
     def size(self):
         with self.lock:
@@ -132,6 +220,7 @@ class CrossThreadList(CrossThreader):
     def replace(self, l:list):
         with self.lock:
             self.l = l.copy() 
+            self.notify()
                     
     def add(self, addition):        
         with self.lock:
@@ -139,28 +228,31 @@ class CrossThreadList(CrossThreader):
                 self.l.extend( addition.copy() )
             else:           
                 self.l.append( self.copyIfNeeded( addition )  )
+            self.notify()
                 
     def moveItem(self, index, offset):        
         with self.lock:
             
-            if len( self.l ) < index or index < 0:
+            if len( self.l ) <= index or index < 0:
                 #index exceeds bounds of l
                 return False 
-            elif index + offset > -1 :
+            elif index + offset < 0 :
                 #new position exceeds lower bounds of l
                 return False 
-            elif index + offset < len( self.l):
+            elif index + offset >= len( self.l):
                 #new position exceeds upper bounds of l
                 return False 
             
             item = self.l.pop( index )
             self.l.insert( index + offset, item )
+            self.notify()
+            return True
             
     def moveItemDown(self, index, offset=1):
-        self.moveItem( index, offset )
+        return self.moveItem( index, offset )
             
     def moveItemUp(self, index, offset=1):
-        self.moveItem( index, 0 - offset )  
+        return self.moveItem( index, 0 - offset )  
             
     def read(self, index):
         with self.lock:
@@ -168,7 +260,179 @@ class CrossThreadList(CrossThreader):
                 return self.copyIfNeeded( self.l[index] )                
             else:
                 return None
-                    
-                
+
+class FrozenCrossThreadItem(CrossThreadItem):
+    def __init__(self, item ):
+        CrossThreader.__init__(self)
+        self.item = self.freeze( item )
         
-        
\ No newline at end of file
+    def get(self):
+        return self.item
+    
+    def set(self, item):
+        item = self.freeze( item )
+        with self.lock:
+            self.item = item
+            self.notify()
+            
+class FrozenCrossThreadDict(CrossThreadDict):
+    def __init__(self, d:dict=None):
+        CrossThreader.__init__(self)
+        if d is None:
+            d = {}
+        self.publish( { key: self.freeze( v ) for key, v in d.items() } )
+        
+    def publish(self, d:dict):
+        # swaps in a new dictionary.  d must never be changed after this.
+        self.d = d
+        self.view = MappingProxyType( d )
+        
+    def get(self, key):
+        return self.view.get( key, False )
+    
+    def set(self, key, v):
+        v = self.freeze( v )
+        with self.lock:
+            d = self.d.copy()
+            d[key] = v
+            self.publish( d )
+            self.notify()
+            
+    def copy(self):
+        return self.view
+    
+    def pop(self, key):
+        with self.lock:
+            if key in self.d:
+                d = self.d.copy()
+                r = d.pop( key )
+                self.publish( d )
+                self.notify()
+                return r
+            else:
+                return False
+            
+    def length(self):
+        return len( self.view )
+    
+    def replace(self, d:dict ):
+        d = { key: self.freeze( v ) for key, v in d.items() }
+        with self.lock:
+            self.publish( d )
+            self.notify()
+            
+    def update(self, d:dict ):
+        d = { key: self.freeze( v ) for key, v in d.items() }
+        with self.lock:
+            new = self.d.copy()
+            new.update( d )
+            self.publish( new )
+            self.notify()
+            
+    def increment(self, key, amount=1):
+        with self.lock:
+            d = self.d.copy()
+            d[key] = d.get( key, 0 ) + amount
+            self.publish( d )
+            self.notify()
+            return d[key]
+        
+class FrozenCrossThreadList(CrossThreadList):
+    '''
+    Every change is made to a list copied from the current tuple, which 
+    then replaces it, by change().  A change that turns out not to change
+    anything returns UNCHANGED, and the tuple is left alone.
+    '''
+    UNCHANGED = object()
+    
+    def __init__(self, l=None):
+        CrossThreader.__init__(self)
+        if l is None:
+            self.l = ()
+        else:
+            self.l = tuple( self.freeze( item ) for item in l )
+            
+    def change(self, method, *args):
+        with self.lock:
+            l = list( self.l )
+            r = method( l, *args )
+            if r is not self.UNCHANGED:
+                self.l = tuple( l )
+                self.notify()
+            return r
+        
+    def append(self, addition):
+        self.change( list.append, self.freeze( addition ) )
+        
+    def clear(self):
+        with self.lock:
+            self.l = ()
+            self.notify()
+            
+    def copy(self):
+        return self.l
+    
+    def length(self):
+        return len( self.l )
+    
+    def size(self):
+        return len( self.l )
+    
+    def extend(self, addition:list):
+        self.change( list.extend, [ self.freeze( item ) for item in addition ] )
+        
+    def index(self, value):
+        return self.l.index( value )
+    
+    def insert(self, index, insertion):
+        self.change( list.insert, index, self.freeze( insertion ) )
+        
+    def pop(self, index):
+        def pop(l, index):
+            if len( l ) > index:
+                return l.pop( index )
+            return self.UNCHANGED
+        r = self.change( pop, index )
+        if r is self.UNCHANGED:
+            return None
+        return r
+    
+    def remove(self, i ):
+        def remove(l, i):
+            if i in l:
+                l.remove( i )
+            else:
+                return self.UNCHANGED
+        self.change( remove, i )
+        
+    def reverse(self):
+        self.change( list.reverse )
+        
+    def sort(self):
+        self.change( list.sort )
+        
+    def replace(self, l:list):
+        l = tuple( self.freeze( item ) for item in l )
+        with self.lock:
+            self.l = l
+            self.notify()
+            
+    def add(self, addition):
+        if type( addition ) == list:
+            self.extend( addition )
+        else:
+            self.append( addition )
+            
+    def moveItem(self, index, offset):
+        def move(l, index, offset):
+            if len( l ) <= index or index < 0 or index + offset < 0 or index + offset >= len( l ):
+                return self.UNCHANGED
+            l.insert( index + offset, l.pop( index ) )
+        return self.change( move, index, offset ) is not self.UNCHANGED
+    
+    def read(self, index):
+        l = self.l
+        if index < len( l ):
+            return l[index]
+        else:
+            return None
@@ -0,0 +1,146 @@
+'''
+Created on Feb 24, 2023
+
+@author: Cather Steincamp
+'''
+
+from threading import Lock, Condition
+from collections import deque, namedtuple
+from itertools import count
+from time import time
+
+# kind is a string, time is when it was published, and data is a 
+# dictionary of whatever the publisher had to say about it
+BusEvent = namedtuple( 'BusEvent', [ 'kind', 'time', 'data' ] )
+
+class EventBus(object):
+    '''
+    Passes events from the threads that make them to the threads that 
+    want to hear about them, without either waiting on the other.
+    
+        lossy
+            default ()
+            the kinds of event that can be thrown away if a subscriber
+            falls behind, like progress reports, where only the latest
+            one really matters.
+            
+    publish( kind, **data ) sends a BusEvent to every subscriber that 
+    wants that kind.  It never blocks, however far behind a subscriber is.
+    
+    subscribe( kinds=None, maxsize=256 ) returns a Subscription, with its
+    own queue of up to maxsize events, of the given kinds (or all of them).
+    When a subscriber's queue is full, the oldest lossy event is thrown
+    away to make room; if there aren't any, the new event is, if it's 
+    lossy, and otherwise the oldest event is.  Whatever is thrown away is 
+    counted in the subscription's dropped.
+    '''
+
+    def __init__(self, lossy=()):
+        self.lossy = frozenset( lossy )
+        self.lock = Lock()
+        self.sequence = count()
+        
+        # replaced, never changed, so publish() can check it without the lock
+        self.subscribers = ()
+        
+    def subscribe(self, kinds=None, maxsize=256):
+        subscription = Subscription( self, kinds, maxsize )
+        with self.lock:
+            self.subscribers = self.subscribers + ( subscription, )
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers = tuple( s for s in self.subscribers if s is not subscription )
+            
+    def publish(self, kind, **data):
+        
+        if len( self.subscribers ) == 0:
+            return
+        
+        event = BusEvent( kind, time(), data )
+        lossy = kind in self.lossy
+        
+        # numbered and handed out under the one lock, so every subscriber 
+        # gets events in the order of their numbers
+        
+        with self.lock:
+            seq = next( self.sequence )
+            for subscription in self.subscribers:
+                subscription.put( event, seq, lossy )
+            
+class Subscription(object):
+    '''
+    One subscriber's queue of events from an EventBus.
+    
+        get( timeout=None )
+                returns the next event, waiting up to timeout seconds
+                (or forever) for one.  Returns None if there isn't one.
+        drain()
+                returns a list of every event waiting, without waiting.
+        close()
+                unsubscribes.
+                
+    Lossy and other events are kept in separate queues, so that throwing 
+    away the oldest lossy event doesn't mean looking for it, but they come
+    out of get() in the order they were published.
+    '''
+    
+    def __init__(self, bus:EventBus, kinds, maxsize):
+        self.bus = bus
+        self.kinds = None if kinds is None else frozenset( kinds )
+        self.maxsize = maxsize
+        self.dropped = 0
+        
+        self.ready = Condition( Lock() )
+        self.lossy = deque()
+        self.kept = deque()
+        
+    def put(self, event, seq, lossy):
+        
+        if self.kinds is not None and event.kind not in self.kinds:
+            return
+        
+        with self.ready:
+            
+            if len( self.lossy ) + len( self.kept ) >= self.maxsize:
+                
+                self.dropped += 1
+                
+                if len( self.lossy ) > 0:
+                    self.lossy.popleft()
+                elif lossy:
+                    return
+                else:
+                    self.kept.popleft()
+                    
+            if lossy:
+                self.lossy.append( ( seq, event ) )
+            else:
+                self.kept.append( ( seq, event ) )
+                
+            self.ready.notify()
+            
+    def next(self):
+        # only called while holding ready
+        if len( self.lossy ) == 0:
+            return self.kept.popleft()[1]
+        if len( self.kept ) == 0 or self.lossy[0][0] < self.kept[0][0]:
+            return self.lossy.popleft()[1]
+        return self.kept.popleft()[1]
+            
+    def get(self, timeout=None):
+        with self.ready:
+            if self.ready.wait_for( lambda: len( self.lossy ) + len( self.kept ) > 0, timeout ) == False:
+                return None
+            return self.next()
+        
+    def drain(self):
+        with self.ready:
+            events = []
+            while len( self.lossy ) + len( self.kept ) > 0:
+                events.append( self.next() )
+            return events
+        
+    def close(self):
+        self.bus.unsubscribe( self )
@@ -0,0 +1,233 @@
+'''
+Created on Feb 16, 2023
+
+@author: Cather Steincamp
+
+Copies and moves big files with as little work as the operating system
+allows, rather than shovelling every byte through Python.
+
+    copyFile( source, destination )
+            copies the file, along with its timestamps and permissions,
+            like shutil.copy2.  Tries each of these in turn, and falls
+            back to the next if the OS or filesystem won't do it:
+
+                reflink           a copy-on-write clone (btrfs, XFS, ...),
+                                  which is instant, whatever the size.
+                copy_file_range   the kernel copies the data itself, and
+                                  may hand it to the filesystem or server.
+                sendfile          the kernel copies the data itself.
+                buffered          plain reads and writes, with a big buffer.
+
+            returns the name of the method that finished the job.  Only
+            "not supported here" errors move on to the next method; any
+            other error, or a copy that comes up short, is raised.
+
+    moveFile( source, destination )
+            if source and the destination folder are on the same device,
+            the file is simply renamed.  Otherwise (or if the rename fails
+            with EXDEV anyway) it is copied with copyFile() and the
+            original deleted.  Returns 'rename' or
+            whatever copyFile() returned.
+
+    sameDevice( source, destination )
+            returns True if source and the folder destination will go in
+            are on the same device, which is to say that a rename will work.
+
+    copyAndHash( source, destination, algorithm )
+            copies the file like copyFile(), but hashes it on the way through,
+            so that a checksum costs no extra reads.  algorithm is any hashlib
+            algorithm, default 'blake2b'.  Since the data has to pass through
+            Python to be hashed, this always does a buffered copy.
+            Returns the size and the hex digest.
+
+    hashFile( filename, algorithm )
+            returns the size and hex digest of a file.  Where the OS allows,
+            it first asks for the file to be dropped from the cache, so that
+            what is hashed is what's on the disk, not what's in memory.
+
+Only the buffered copy is available on Windows.
+'''
+
+import os
+import errno
+import hashlib
+from shutil import copystat
+
+try:
+    from fcntl import ioctl
+except ImportError:
+    ioctl = None
+
+# from linux/fs.h
+FICLONE = 0x40049409
+
+# what the OS says when a method can't be used here, rather than that it failed.
+# anything else (a full disk, a bad sector) is a real error, and is raised.
+UNSUPPORTED = { errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTTY, errno.EBADF }
+
+# for the methods that need to be told how much to copy at a time
+CHUNKSIZE = 2 ** 30
+BUFFERSIZE = 2 ** 23
+
+def sameDevice(source, destination):
+    folder = os.path.dirname( os.path.abspath( destination ) )
+    return os.stat( source ).st_dev == os.stat( folder ).st_dev
+
+def reflink(src, dst, offset, size):
+    if ioctl is None or offset != 0:
+        raise OSError( errno.ENOSYS, 'reflink unavailable' )
+    ioctl( dst, FICLONE, src )
+    return size
+
+def copyRange(src, dst, offset, size):
+    if hasattr( os, 'copy_file_range' ) == False:
+        raise OSError( errno.ENOSYS, 'copy_file_range unavailable' )
+    while offset < size:
+        copied = os.copy_file_range( src, dst, min( CHUNKSIZE, size - offset ), offset, offset )
+        if copied == 0:
+            break
+        offset += copied
+    return offset
+
+def sendFile(src, dst, offset, size):
+    if hasattr( os, 'sendfile' ) == False or os.name == 'nt':
+        raise OSError( errno.ENOSYS, 'sendfile unavailable' )
+    os.lseek( dst, offset, os.SEEK_SET )
+    while offset < size:
+        copied = os.sendfile( dst, src, offset, min( CHUNKSIZE, size - offset ) )
+        if copied == 0:
+            break
+        offset += copied
+    return offset
+
+def buffered(src, dst, offset, size):
+    os.lseek( src, offset, os.SEEK_SET )
+    os.lseek( dst, offset, os.SEEK_SET )
+    while True:
+        data = os.read( src, BUFFERSIZE )
+        if len( data ) == 0:
+            break
+        view = memoryview( data )
+        while len( view ) > 0:
+            written = os.write( dst, view )
+            view = view[written:]
+        offset += len( data )
+    return offset
+
+METHODS = [ ( 'reflink', reflink ), ( 'copy_file_range', copyRange ), ( 'sendfile', sendFile ), ( 'buffered', buffered ) ]
+
+def copyFile(source, destination):
+
+    flags = os.O_RDONLY | getattr( os, 'O_BINARY', 0 )
+    src = os.open( source, flags )
+
+    try:
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr( os, 'O_BINARY', 0 )
+        dst = os.open( destination, flags, 0o666 )
+
+        try:
+            size = os.fstat( src ).st_size
+            offset = 0
+
+            for name, method in METHODS:
+                if name == 'buffered':
+                    # the last resort, so whatever goes wrong goes to the caller
+                    offset = method( src, dst, offset, size )
+                    break
+
+                try:
+                    offset = method( src, dst, offset, size )
+                except OSError as e:
+                    if e.errno not in UNSUPPORTED:
+                        raise
+                    # not supported here; pick up where it left off with the next one
+                    continue
+
+                if offset >= size:
+                    break
+
+        finally:
+            os.close( dst )
+    finally:
+        os.close( src )
+
+    if offset != size:
+        raise OSError( errno.EIO, 'copied ' + str( offset ) + ' of ' + str( size ) + ' bytes', destination )
+
+    copystat( source, destination )
+
+    return name
+
+def copyAndHash(source, destination, algorithm='blake2b'):
+
+    hasher = hashlib.new( algorithm )
+    size = 0
+
+    src = open( source, 'rb' )
+    try:
+        dst = open( destination, 'wb' )
+        try:
+            while True:
+                data = src.read( BUFFERSIZE )
+                if len( data ) == 0:
+                    break
+                hasher.update( data )
+                dst.write( data )
+                size += len( data )
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
+    copystat( source, destination )
+
+    return size, hasher.hexdigest()
+
+def hashFile(filename, algorithm='blake2b'):
+
+    hasher = hashlib.new( algorithm )
+    size = 0
+
+    f = open( filename, 'rb' )
+    try:
+        if hasattr( os, 'posix_fadvise' ):
+            try:
+                os.posix_fadvise( f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED )
+            except OSError:
+                pass
+
+        while True:
+            data = f.read( BUFFERSIZE )
+            if len( data ) == 0:
+                break
+            hasher.update( data )
+            size += len( data )
+    finally:
+        f.close()
+
+    return size, hasher.hexdigest()
+
+def moveFile(source, destination):
+
+    if sameDevice( source, destination ):
+        try:
+            os.replace( source, destination )
+            return 'rename'
+        except OSError as e:
+            # bind mounts and overlayfs can share a device and still refuse
+            if e.errno != errno.EXDEV:
+                raise
+
+    try:
+        method = copyFile( source, destination )
+    except OSError:
+        # the original is all we've got, so it stays, and the half copy goes
+        try:
+            os.remove( destination )
+        except OSError:
+            pass
+        raise
+
+    os.remove( source )
+
+    return method
@@ -0,0 +1,93 @@
+'''
+Created on Feb 4, 2023
+
+@author: Cather Steincamp
+
+    FrameReader splits the output of a process into "frames" as it arrives.
+
+    A frame ends at a newline OR a carriage return.  Programs like HandBrakeCLI
+    report their progress by rewriting the same line over and over with \r,
+    so splitting only on newlines (as readline() does) means none of that
+    progress is seen until a newline finally turns up, by which point it has
+    all piled up into one enormous line.
+
+    feed( data )
+                takes a chunk of bytes, exactly as read from the pipe, and
+                returns a list of every frame completed by it.  Anything after
+                the last \r or \n is held until the next feed().
+    flush()
+                returns whatever is left over as a list of (at most one) frame.
+                Used once the pipe has closed.
+
+    The constructor arguments are:
+
+        text
+            default True
+            if True, the bytes are decoded and the frames are strings.
+            otherwise they are bytes.
+        encoding
+            default 'utf-8'
+            Characters split between two chunks are handled properly.
+        limit
+            default 1 MiB
+            an unfinished frame longer than this is returned as-is, rather
+            than held onto indefinitely.
+
+    Frames have trailing whitespace stripped, and blank frames are dropped.
+'''
+
+import codecs
+import re
+
+class FrameReader(object):
+
+    def __init__(self, text=True, encoding='utf-8', limit=2**20):
+
+        self.text = text
+        self.limit = limit
+
+        if text:
+            self.decoder = codecs.getincrementaldecoder( encoding )( errors='replace' )
+            self.pending = ''
+            self.splitter = re.compile( '[\r\n]' )
+        else:
+            self.decoder = None
+            self.pending = b''
+            self.splitter = re.compile( b'[\r\n]' )
+
+    def feed(self, data:bytes):
+
+        if self.decoder is not None:
+            data = self.decoder.decode( data )
+
+        pieces = self.splitter.split( self.pending + data )
+
+        # the last piece hasn't been ended yet
+        self.pending = pieces.pop()
+
+        if len( self.pending ) > self.limit:
+            pieces.append( self.pending )
+            self.pending = self.pending[:0]
+
+        return self.clean( pieces )
+
+    def flush(self):
+
+        if self.decoder is not None:
+            self.pending += self.decoder.decode( b'', True )
+
+        pieces = [ self.pending ]
+        self.pending = self.pending[:0]
+
+        return self.clean( pieces )
+
+    def clean(self, pieces):
+
+        frames = []
+
+        for piece in pieces:
+            piece = piece.rstrip()
+            if len( piece ) > 0:
+                frames.append( piece )
+
+        return frames
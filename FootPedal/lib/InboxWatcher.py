@@ -0,0 +1,233 @@
+'''
+Created on Feb 28, 2023
+
+@author: Cather Steincamp
+
+    InboxWatcher watches a folder for files arriving in it, and once they've
+    settled, hands their names to a handler.
+
+    On Linux it uses inotify (through ctypes), so the folder is never listed
+    again after the watcher starts, and new files are noticed as soon as
+    they've been written (IN_CLOSE_WRITE) or moved in (IN_MOVED_TO).
+    Elsewhere, or if inotify can't be had, it falls back to listing the
+    folder every interval seconds and noticing what's new or has changed.
+
+        folder
+            the folder to watch
+        handler
+            called with a list of file names (not paths) from the watcher's
+            thread.  A file is only handed over once nothing has happened to
+            it for settle seconds, and only once, unless it's removed and
+            turns up again.  Files already there when the watcher starts
+            are left alone.
+        settle
+            default 0.5
+        interval
+            default 0.5
+            how often to list the folder, if inotify isn't available
+
+    Names starting with '.' are ignored, since that's how most programs
+    name a file they haven't finished with.
+
+    mode is 'inotify' or 'polling', whichever is in use, and stop() stops
+    the watcher's thread.
+'''
+
+import os
+import struct
+import ctypes
+import ctypes.util
+import selectors
+from threading import Thread
+from time import monotonic, sleep
+
+# from sys/inotify.h
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+EVENT = struct.Struct( 'iIII' )
+
+try:
+    libc = ctypes.CDLL( ctypes.util.find_library( 'c' ), use_errno=True )
+    libc.inotify_init1
+    libc.inotify_add_watch
+except ( OSError, AttributeError, TypeError ):
+    libc = None
+
+# how long the thread waits at most before checking whether it's been stopped
+TICK = 1.0
+
+class InboxWatcher(object):
+
+    supported = libc is not None
+
+    def __init__(self, folder, handler, settle=0.5, interval=0.5):
+        self.folder = folder
+        self.handler = handler
+        self.settle = settle
+        self.interval = interval
+        self.running = True
+
+        # name: when something last happened to it
+        self.pending = {}
+
+        # watching starts first, so nothing can arrive unseen in between
+        self.fd = self.startInotify()
+
+        self.known = set( self.listing() )
+
+        if self.fd is None:
+            self.mode = 'polling'
+            self.stats = self.listing()
+            self.t = Thread( target=self.poll, daemon=True )
+        else:
+            self.mode = 'inotify'
+            self.t = Thread( target=self.watch, daemon=True )
+
+        self.t.start()
+
+    def stop(self):
+        self.running = False
+
+    def listing(self):
+        # returns { name: ( size, mtime ) } for the files in the folder
+        files = {}
+        with os.scandir( self.folder ) as it:
+            for entry in it:
+                if entry.name.startswith( '.' ):
+                    continue
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        files[entry.name] = ( stat.st_size, stat.st_mtime_ns )
+                except OSError:
+                    # gone already
+                    continue
+        return files
+
+    def startInotify(self):
+
+        if libc is None:
+            return None
+
+        fd = libc.inotify_init1( IN_NONBLOCK | IN_CLOEXEC )
+        if fd < 0:
+            return None
+
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+        if libc.inotify_add_watch( fd, os.fsencode( self.folder ), mask ) < 0:
+            os.close( fd )
+            return None
+
+        return fd
+
+    def touched(self, name):
+        if name.startswith( '.' ) == False:
+            self.pending[name] = monotonic()
+
+    def removed(self, name):
+        self.pending.pop( name, None )
+        self.known.discard( name )
+
+    def flush(self):
+        '''
+        hands over whatever has settled, and returns how long until the
+        next thing will have, or None if nothing is waiting
+        '''
+        now = monotonic()
+        settled = [ name for name in self.pending if now - self.pending[name] >= self.settle ]
+
+        for name in settled:
+            del self.pending[name]
+
+        # something that was already there may have been written to again
+        settled = [ name for name in settled if name not in self.known ]
+
+        if len( settled ) > 0:
+            self.known.update( settled )
+            try:
+                self.handler( sorted( settled ) )
+            except Exception:
+                # the handler's problem; the watcher carries on
+                pass
+
+        if len( self.pending ) == 0:
+            return None
+
+        return max( 0, min( self.pending.values() ) + self.settle - now )
+
+    def readEvents(self):
+
+        while True:
+            try:
+                data = os.read( self.fd, 65536 )
+            except BlockingIOError:
+                return
+
+            offset = 0
+            while offset < len( data ):
+                wd, mask, cookie, length = EVENT.unpack_from( data, offset )
+                offset += EVENT.size
+                name = os.fsdecode( data[offset:offset + length].rstrip( b'\0' ) )
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    # events were lost; this once, see for ourselves
+                    for name in self.listing():
+                        if name not in self.known:
+                            self.touched( name )
+                elif mask & IN_ISDIR:
+                    continue
+                elif mask & ( IN_MOVED_FROM | IN_DELETE ):
+                    self.removed( name )
+                else:
+                    self.touched( name )
+
+    def watch(self):
+
+        selector = selectors.DefaultSelector()
+        selector.register( self.fd, selectors.EVENT_READ )
+
+        wait = None
+
+        while self.running:
+
+            if wait is None:
+                wait = TICK
+
+            if len( selector.select( min( wait, TICK ) ) ) > 0:
+                self.readEvents()
+
+            wait = self.flush()
+
+        selector.close()
+        os.close( self.fd )
+
+    def poll(self):
+
+        while self.running:
+
+            sleep( self.interval )
+
+            try:
+                stats = self.listing()
+            except OSError:
+                # the folder's gone away for now (a network drive, maybe)
+                continue
+
+            for name in stats:
+                if stats[name] != self.stats.get( name ):
+                    self.touched( name )
+
+            for name in self.stats:
+                if name not in stats:
+                    self.removed( name )
+
+            self.stats = stats
+            self.flush()
@@ -0,0 +1,293 @@
+'''
+Created on Feb 21, 2023
+
+@author: Cather Steincamp
+'''
+
+from lib.CrossThreaders import CrossThreader
+from heapq import heappush, heappop
+from bisect import bisect_left, insort
+from itertools import count
+from operator import itemgetter
+from uuid import uuid4
+
+class JobStore(CrossThreader):
+    '''
+    An ordered, indexed store of jobs, for queues too long for a 
+    CrossThreadList to be scanning from end to end.
+    
+    Every job has a stable id, job['id'], which it's given when it's added
+    if it doesn't already have one.  Jobs are kept in order of a key 
+    worked out by key() when they're added; by default, the order they 
+    were added in.  Subclasses can override key() to order them however 
+    they like (see HandBrakeUtils.hbScheduler).
+    
+    The next job is kept at the top of a heap, so adding and taking jobs
+    is O(log n).  Looking a job up by its id is O(1).
+    
+    The whole queue in order is only worked out the first time someone
+    asks for it, and after that it's kept up to date as jobs come and go,
+    so that views of the queue don't sort it over and over.
+    
+        append( job ), extend( jobs )
+        pop()
+                takes the next job, or returns None if there isn't one
+        peek()
+                returns the next job, without taking it
+        get( jobId )
+                returns the job with that id, or None
+        position( jobId )
+                returns where the job is in the queue, or None
+        remove( job )
+                takes the job out of the queue.  job can be the job or its id.
+        update( job )
+                swaps in a new version of a queued job (with the same id),
+                filed under the key rekey() gives it.  Returns False if 
+                the job isn't in the queue any more.
+        moveItem( index, offset ), moveItemUp( index ), moveItemDown( index )
+                as in CrossThreadList
+        moveJob( jobId, offset )
+                moveItem(), by id
+        length()
+        snapshot()
+                returns a tuple of the jobs, in order
+        copy()
+                returns a list of copies of the jobs, in order
+                
+    Like the other CrossThreaders it can be watch()ed, and jobs are copied
+    on the way in.  Unlike them, peek(), get(), and snapshot() hand out the 
+    jobs themselves, so that reading thousands of them doesn't mean copying 
+    thousands of dictionaries.  Treat them as read-only, and use copy() if 
+    you need to change something.
+    
+    Jobs that are removed or moved are only marked in the heap, and skipped
+    when they come up.
+    '''
+
+    def __init__(self, jobs:list=None):
+        CrossThreader.__init__(self)
+        
+        # each entry is [ key, sequence, job, live ]
+        self.heap = []
+        self.entries = {}
+        self.sequence = count()
+        
+        # only kept once someone asks for them
+        self.order = None
+        self.positions = None
+        self.frozen = None
+        
+        if jobs is not None:
+            for job in jobs:
+                self.push( job.copy() )
+                
+    def newId(self):
+        return uuid4().hex
+                
+    def key(self, job:dict, seq):
+        return ( seq, )
+    
+    def taken(self, entry):
+        # called when a job is popped, for subclasses that need to know
+        pass
+    
+    def rekey(self, entry, job:dict):
+        # the key for a new version of the job in entry.  It stays where it is.
+        return entry[0]
+    
+    def changed(self):
+        # only called while holding the lock
+        self.positions = None
+        self.frozen = None
+        self.notify()
+        
+    def locate(self, entry):
+        # only called while holding the lock, with order up to date
+        return bisect_left( self.order, entry )
+    
+    def ordered(self):
+        # only called while holding the lock
+        if self.order is None:
+            self.order = sorted( self.entries.values() )
+        return self.order
+    
+    def push(self, job:dict, key=None, seq=None):
+        # only called while holding the lock, or before anyone else has it
+        
+        if 'id' not in job:
+            job['id'] = self.newId()
+        
+        if seq is None:
+            seq = next( self.sequence )
+        
+        if key is None:
+            key = self.key( job, seq )
+        
+        entry = [ key, seq, job, True ]
+        old = self.entries.get( job['id'] )
+        
+        if old is not None:
+            # moved, or added twice.  the old entry is skipped when it comes up.
+            old[3] = False
+            if self.order is not None:
+                del self.order[self.locate( old )]
+        
+        self.entries[job['id']] = entry
+        heappush( self.heap, entry )
+        
+        if self.order is not None:
+            insort( self.order, entry )
+        
+    def discard(self):
+        # drops entries that have been removed or moved from the top of the heap
+        while len( self.heap ) > 0 and self.heap[0][3] == False:
+            heappop( self.heap )
+        
+    def append(self, job:dict):
+        job = job.copy()
+        with self.lock:
+            self.push( job )
+            self.changed()
+            
+    def extend(self, jobs:list):
+        jobs = [ job.copy() for job in jobs ]
+        with self.lock:
+            for job in jobs:
+                self.push( job )
+            self.changed()
+            
+    def pop(self):
+        with self.lock:
+            self.discard()
+            
+            if len( self.heap ) == 0:
+                return None
+            
+            entry = heappop( self.heap )
+            del self.entries[entry[2]['id']]
+            
+            if self.order is not None:
+                # the top of the heap is always the front of the queue
+                del self.order[0]
+            
+            self.taken( entry )
+            self.changed()
+            return entry[2]
+        
+    def peek(self):
+        with self.lock:
+            self.discard()
+            
+            if len( self.heap ) == 0:
+                return None
+            
+            return self.heap[0][2]
+        
+    def get(self, jobId):
+        with self.lock:
+            entry = self.entries.get( jobId )
+            
+            if entry is None:
+                return None
+            
+            return entry[2]
+        
+    def position(self, jobId):
+        with self.lock:
+            if self.positions is None:
+                self.positions = { entry[2]['id']: i for i, entry in enumerate( self.ordered() ) }
+            return self.positions.get( jobId )
+        
+    def length(self):
+        with self.lock:
+            return len( self.entries )
+        
+    def snapshot(self):
+        with self.lock:
+            if self.frozen is None:
+                self.frozen = tuple( map( itemgetter( 2 ), self.ordered() ) )
+            return self.frozen
+        
+    def copy(self):
+        return [ job.copy() for job in self.snapshot() ]
+        
+    def remove(self, job):
+        
+        # a dictionary, a record with an id (like an hbJob), or the id itself
+        if isinstance( job, dict ):
+            job = job.get( 'id' )
+        elif isinstance( job, str ) == False:
+            job = getattr( job, 'id', None )
+        
+        with self.lock:
+            
+            entry = self.entries.pop( job, None )
+                    
+            if entry is None:
+                return False
+            
+            entry[3] = False
+            
+            if self.order is not None:
+                del self.order[self.locate( entry )]
+                
+            self.changed()
+            return True
+        
+    def update(self, job):
+        job = job.copy()
+        with self.lock:
+            
+            entry = self.entries.get( job['id'] )
+            
+            if entry is None:
+                return False
+            
+            self.push( job, self.rekey( entry, job ), entry[1] )
+            self.changed()
+            return True
+        
+    def moveItem(self, index, offset):
+        with self.lock:
+            
+            entries = self.ordered()
+            
+            if len( entries ) <= index or index < 0:
+                return False
+            elif index + offset < 0 or index + offset >= len( entries ):
+                return False
+            elif offset == 0:
+                return True
+            
+            # take the neighbour's key, and bump the last part of it just
+            # enough to land between the neighbour and the one beyond it
+            
+            neighbour = entries[index + offset][0]
+            
+            if offset > 0:
+                beyond = index + offset + 1
+                last = neighbour[-1] + 0.5
+            else:
+                beyond = index + offset - 1
+                last = neighbour[-1] - 0.5
+                
+            if beyond >= 0 and beyond < len( entries ) and entries[beyond][0][:-1] == neighbour[:-1]:
+                last = ( neighbour[-1] + entries[beyond][0][-1] ) / 2
+            
+            self.push( entries[index][2], neighbour[:-1] + ( last, ) )
+            self.changed()
+            return True
+        
+    def moveJob(self, jobId, offset):
+        index = self.position( jobId )
+        
+        if index is None:
+            return False
+        
+        return self.moveItem( index, offset )
+            
+    def moveItemDown(self, index, offset=1):
+        return self.moveItem( index, offset )
+            
+    def moveItemUp(self, index, offset=1):
+        return self.moveItem( index, 0 - offset )
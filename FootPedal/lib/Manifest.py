@@ -0,0 +1,102 @@
+'''
+Created on Feb 17, 2023
+
+@author: Cather Steincamp
+'''
+
+from lib.CrossThreaders import CrossThreadList
+from lib.FastCopy import hashFile
+from threading import Lock, Thread, Event
+from time import time
+import json
+
+class Manifest(object):
+    '''
+    Keeps a record of copied files and their checksums, one line of JSON
+    per file, so that backups can be trusted without reading them again.
+
+        filename
+            the manifest file.  New entries are appended to it.
+        algorithm
+            default 'blake2b'
+            the hashlib algorithm the checksums were made with
+        verify
+            default False
+            if True, every file recorded is read back from its destination
+            in a background thread and checked against its checksum.  The
+            result is added to the manifest as an entry of its own.
+
+    Entries look like this:
+
+        {"path": ..., "size": ..., "digest": ..., "algorithm": ..., "time": ...}
+        {"path": ..., "verified": true, "time": ...}
+
+    Methods:
+
+        record( path, size, digest )
+                adds an entry for a file, and queues it for verification.
+        mismatches()
+                returns a list of the paths that failed verification.
+        pending()
+                returns the number of files waiting to be verified.
+    '''
+
+    def __init__(self, filename, algorithm='blake2b', verify=False):
+        self.filename = filename
+        self.algorithm = algorithm
+        self.verify = verify
+        self.lock = Lock()
+
+        self.failures = CrossThreadList()
+        self.queue = CrossThreadList()
+
+        if verify:
+            self.wakeup = Event()
+            self.queue.watch( self.wakeup )
+            self.t = Thread( target=self.verifier, daemon=True )
+            self.t.start()
+
+    def write(self, entry:dict):
+        with self.lock:
+            f = open( self.filename, 'a', encoding='utf-8' )
+            f.write( json.dumps( entry ) + '\n' )
+            f.close()
+
+    def record(self, path, size, digest):
+
+        self.write( { 'path': path, 'size': size, 'digest': digest, 'algorithm': self.algorithm, 'time': time() } )
+
+        if self.verify:
+            self.queue.append( [ path, size, digest ] )
+
+    def mismatches(self):
+        return self.failures.copy()
+
+    def pending(self):
+        return self.queue.length()
+
+    def verifier(self):
+
+        while True:
+
+            self.wakeup.clear()
+            item = self.queue.read( 0 )
+
+            if item is None:
+                self.wakeup.wait()
+                continue
+
+            path, size, digest = item
+
+            try:
+                verified = hashFile( path, self.algorithm ) == ( size, digest )
+            except OSError:
+                verified = False
+
+            if verified == False:
+                self.failures.add( path )
+
+            self.write( { 'path': path, 'verified': verified, 'time': time() } )
+
+            # only taken off the queue once it's done, so pending() counts it
+            self.queue.pop( 0 )
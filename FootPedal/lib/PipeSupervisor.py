@@ -0,0 +1,212 @@
+'''
+Created on Feb 10, 2023
+
+@author: Cather Steincamp
+
+    PipeSupervisor reads the output of any number of Pwatch processes from a
+    single thread, using selectors (epoll on Linux), instead of each process
+    tying up a thread or two of its own blocked in a read.
+
+    Output is split into frames with lib.FrameReader and handed to each
+    process's processOutput() (or processError(), for a separate STDERR pipe),
+    exactly as Pwatch's own monitors would.  Once a process has closed its
+    pipes and exited, the supervisor calls its finished().
+
+    Usage is simply to pass the supervisor to Pwatch (or anything built on it):
+
+        supervisor = PipeSupervisor()
+        p = Pwatch( args, supervisor=supervisor )
+
+    IMPORTANT: On Windows, select() only works on sockets, not pipes, so
+    there supported is False, and Pwatch quietly falls back to its own threads.
+
+    Methods:
+
+        add( pwatch )
+                    starts supervising a Pwatch.  Called by Pwatch itself.
+        count()
+                    returns the number of processes being supervised.
+        stop()
+                    stops the supervisor's thread.  Anything it was
+                    supervising is abandoned.
+
+    The handlers are called from the supervisor's thread, so they should not
+    block, or every process it supervises will wait on them.  If a handler
+    (or finished()) raises an exception, it's written to logFile, if there
+    is one, and the supervisor carries on with everything else.  The pipe
+    stays open and is still read, so the process doesn't notice, but what
+    comes out of it is thrown away from then on.  Only if reading the pipe
+    itself fails is it closed.
+
+        logFile
+            default None
+            where to note exceptions raised by handlers
+'''
+
+import os
+import selectors
+from subprocess import PIPE
+from threading import Thread, Lock
+from lib.FrameReader import FrameReader
+
+# how much to read from a pipe at a time
+CHUNKSIZE = 65536
+
+# how often to check on processes that have closed their pipes but not exited
+REAPINTERVAL = 0.1
+
+class PipeSupervisor(object):
+
+    supported = os.name != 'nt'
+
+    def __init__(self, logFile=None):
+
+        self.logFile = logFile
+        self.lock = Lock()
+        self.selector = selectors.DefaultSelector()
+        self.pending = []
+        self.open = {}
+        self.reaping = []
+        self.running = True
+
+        # writing to this pipe wakes the thread up from select() so
+        # that it can register new processes
+
+        self.wakeRead, self.wakeWrite = os.pipe()
+        self.selector.register( self.wakeRead, selectors.EVENT_READ, None )
+
+        self.t = Thread( target=self.run, daemon=True )
+        self.t.start()
+
+    def add(self, pwatch):
+        with self.lock:
+            self.pending.append( pwatch )
+        os.write( self.wakeWrite, b'!' )
+
+    def count(self):
+        with self.lock:
+            return len( self.open ) + len( self.reaping ) + len( self.pending )
+
+    def stop(self):
+        self.running = False
+        os.write( self.wakeWrite, b'!' )
+
+    def register(self):
+
+        with self.lock:
+            pending = self.pending
+            self.pending = []
+
+        for pwatch in pending:
+
+            pipes = [ ( pwatch.stdout, pwatch.processOutput ) ]
+
+            if pwatch.errHandling == PIPE:
+                pipes.append( ( pwatch.stderr, pwatch.processError ) )
+
+            with self.lock:
+                self.open[pwatch] = len( pipes )
+
+            for pipe, handler in pipes:
+                self.selector.register( pipe.fileno(), selectors.EVENT_READ,
+                                        ( pwatch, pipe, FrameReader( pwatch.text ), handler ) )
+
+    def read(self, key):
+
+        pwatch, pipe, reader, handler = key.data
+
+        data = os.read( key.fd, CHUNKSIZE )
+
+        if len( data ) > 0:
+            frames = reader.feed( data )
+        else:
+            # the process has closed the pipe
+            frames = reader.flush()
+
+        try:
+            for frame in frames:
+                handler( frame )
+        except Exception as e:
+            self.debug( 'Handling output from ' + repr( pwatch.args ) + ' failed: ' + repr( e ) )
+            if len( data ) > 0:
+                # closing the pipe would kill the process, which is fine;
+                # it's only our handler that's broken.  keep draining it.
+                self.selector.modify( key.fd, selectors.EVENT_READ, ( pwatch, pipe, reader, self.discard ) )
+
+        if len( data ) == 0:
+            self.close( key )
+
+    def discard(self, frame):
+        pass
+
+    def close(self, key):
+
+        pwatch, pipe, reader, handler = key.data
+
+        try:
+            self.selector.unregister( key.fd )
+        except KeyError:
+            # already closed
+            return
+
+        pipe.close()
+
+        with self.lock:
+            self.open[pwatch] -= 1
+            if self.open[pwatch] > 0:
+                return
+            del self.open[pwatch]
+            self.reaping.append( pwatch )
+
+    def reap(self):
+
+        with self.lock:
+            reaping = self.reaping
+            self.reaping = []
+
+        for pwatch in reaping:
+
+            if pwatch.poll() is None:
+                # closed its pipes, but hasn't exited yet
+                with self.lock:
+                    self.reaping.append( pwatch )
+            else:
+                try:
+                    pwatch.finished()
+                except Exception as e:
+                    self.debug( 'finished() failed for ' + repr( pwatch.args ) + ': ' + repr( e ) )
+
+    def debug(self, debug):
+        if self.logFile is None:
+            return
+        f = open( self.logFile, 'a' )
+        f.write( str( debug ) + '\n' )
+        f.close()
+
+    def run(self):
+
+        while self.running:
+
+            with self.lock:
+                if len( self.reaping ) > 0:
+                    timeout = REAPINTERVAL
+                else:
+                    timeout = None
+
+            for key, mask in self.selector.select( timeout ):
+
+                if key.data is None:
+                    os.read( self.wakeRead, CHUNKSIZE )
+                    self.register()
+                else:
+                    try:
+                        self.read( key )
+                    except Exception as e:
+                        self.debug( 'Reading from ' + repr( key.data[0].args ) + ' failed: ' + repr( e ) )
+                        self.close( key )
+
+            self.reap()
+
+        self.selector.close()
+        os.close( self.wakeRead )
+        os.close( self.wakeWrite )
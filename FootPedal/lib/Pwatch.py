@@ -9,6 +9,10 @@ Created on Dec 10, 2022
     It has all of the same arguments excepting STDOUT, which is fixed as PIPE.  
     The default value for stderr has been changed to STDOUT.  
     
+    It also takes an optional supervisor, a lib.PipeSupervisor.  If one is given 
+    (and the platform supports it), the supervisor's thread reads the pipes, 
+    and no monitoring threads are started for this process at all.
+    
     IMPORTANT:  For reasons I have yet to ascertain, if 'stderr' is set to PIPE, 
     the process locks when used for what I'm using it for.  This happens with Popen, 
     and not my code, so I've left the code in place because damnit, it should work.
@@ -50,15 +54,19 @@ Created on Dec 10, 2022
                     runs in its own thread.  Processes output from STDERR and passes
                     each line to processError().  Only executed if stderr is set to PIPE.
                     
-                    Stops running when the process ends.
+                    Stops running when the process closes STDERR.
                     
         outputMonitor()
                     runs in its own thread.  Processes output from STDOUT and passes
                     each line to processOutput().
                     
-                    When the process ends, will process any remaining STDOUT output
-                    using processOutput(), as well as (if stderr is set to PIPE) anything 
-                    remaining from STDERR using processError()
+                    Output is read in chunks as soon as it is available, and split into
+                    lines at carriage returns as well as newlines (see lib.FrameReader), 
+                    so that progress reports that rewrite the same line are seen as 
+                    they happen.
+                    
+                    When STDOUT closes, waits for the process (and, if stderr is set to 
+                    PIPE, the errorMonitor) to finish before marking processing done.
         
         processOutput( output)
         processError( error )
@@ -69,28 +77,50 @@ Created on Dec 10, 2022
         overkill()
                     bypass Popen's terminate() and kill() and uses psutil to get 
                     the job done.
+                    
+        watch( event )
+        unwatch( event )
+                    registers (or unregisters) a threading.Event that will be set 
+                    when processing has finished, for those who would rather 
+                    wait() than poll isProcessing().  If processing has already 
+                    finished, the event is set immediately.
+                    
+        finished()
+                    marks processing as done and sets any watchers.  Called once all
+                    output has been processed and the process has ended.
 '''
 
 from subprocess import Popen, PIPE, STDOUT
 from threading import Thread, Lock
 from psutil import Process
+from lib.FrameReader import FrameReader
+import os
+
+# how much to read from a pipe at a time
+CHUNKSIZE = 65536
 
 class Pwatch(Popen):
     
-    def __init__(self, args, stderr=STDOUT, **kwargs):
+    def __init__(self, args, stderr=STDOUT, supervisor=None, **kwargs):
         
         if 'stdout' in kwargs:
             del kwargs['stdout']           
                 
         self.errHandling = stderr
+        self.text = kwargs.get( 'text', False ) or kwargs.get( 'universal_newlines', False )
         self.processing = True
         self.suspended = False
         self.runlock = Lock()
+        self.watchers = []
         
         Popen.__init__(self, args, stdout=PIPE, stderr=stderr, **kwargs )
         
         self.process = Process( self.pid )
         
+        if supervisor is not None and supervisor.supported:
+            supervisor.add( self )
+            return
+        
         self.tOut = Thread( target = self.outputMonitor )
         self.tOut.start()
         
@@ -120,35 +150,63 @@ class Pwatch(Popen):
     def isSuspended(self):
         with self.runlock:
             return self.suspended    
+        
+    def watch(self, event):
+        with self.runlock:
+            self.watchers.append( event )
+            if self.processing == False:
+                event.set()
+                
+    def unwatch(self, event):
+        with self.runlock:
+            if event in self.watchers:
+                self.watchers.remove( event )
+            
+    def readFrames(self, pipe, handler):
+        
+        # read straight from the file descriptor, which hands back whatever
+        # is available rather than waiting for a whole line
+        
+        reader = FrameReader( self.text )
+        fd = pipe.fileno()
+        
+        while True:
+            data = os.read( fd, CHUNKSIZE )
+            
+            if len( data ) == 0:
+                # the process has closed the pipe
+                break
+            
+            for frame in reader.feed( data ):
+                handler( frame )
+                
+        for frame in reader.flush():
+            handler( frame )
+            
+        pipe.close()
             
     def outputMonitor(self):        
-                    
-        while self.poll() is None:
-            output = self.stdout.readline().rstrip()                         
-            if  len( output ) > 0 :
-                self.processOutput( output )
-                    
-        # process is done, get the last of it
-    
-        output, error = self.communicate()
         
-        for line in output.split( '\n' ):
-            self.processOutput( line )
+        self.readFrames( self.stdout, self.processOutput )
+        
+        # process is done, or at least done talking
+        
+        self.wait()
         
         if self.errHandling == PIPE:
             self.tErr.join()
-            for line in error.split( '\n' ):
-                self.processError( line )
         
+        self.finished()
+        
+    def finished(self):
         with self.runlock:
             self.processing = False 
+            for event in self.watchers:
+                event.set()
                     
     def errorMonitor(self):
-           
-        while self.poll() is None: 
-            error = self.stderr.readline().rstrip()
-            if  len( error ) > 0 :
-                self.processError( error )
+        
+        self.readFrames( self.stderr, self.processError )
                                
     def processOutput(self, output ):
         pass            
@@ -5,8 +5,13 @@ Created on January 21, 2023
 
 '''
 
-import tvdb_v4_official
-import re
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import tvdb_v4_official
+except ImportError:
+    tvdb_v4_official = None
 
 AIRED = 1
 DVD = 2 
@@ -15,62 +20,174 @@ ALTERNATE = 4
 
 ORDERTYPES = { 1:'AIRED', 2:'DVD', 3:'ABSOLUTE', 4:'ALTERNATE' }
 
+# what purify() does to a title
+PURIFY = str.maketrans( { '?': '', ':': ' -', '\t': '' } )
+
+# how many seasons are asked for at once
+WORKERS = 8
+
+# logging in is a round trip of its own, so there's one client per API key,
+# shared by every show
+clients = {}
+clientLock = Lock()
+
+def getClient(apiKey, pin):
+    with clientLock:
+        if ( apiKey, pin ) not in clients:
+            if tvdb_v4_official is None:
+                raise ImportError( 'tvdb_v4_official is not installed' )
+            clients[( apiKey, pin )] = tvdb_v4_official.TVDB( apiKey, pin )
+        return clients[( apiKey, pin )]
+
 class TVShow(object):
     '''
     Used to extract episode names from a show.  
+    
+    Once the show is loaded, every title is purified and indexed, so 
+    looking one up is a single dictionary lookup:
+    
+        getEpisodeTitleOptions( season, episode )
+                returns a dictionary of the titles for that episode, keyed
+                by the name of each order that has one.
+        getManyEpisodeTitleOptions( episodes )
+                the same, for a whole list of ( season, episode ) pairs, 
+                such as every file in an inbox.  Returns a list.
+        getEpisodeTitle( order, season, episode )
+                returns the title in one order, or None.
+        getAbsoluteTitle( number )
+                returns the title of an episode by its absolute number, or
+                None.  Where the show has no absolute order, episodes are 
+                counted in aired order, leaving out season 0 (the specials).
     '''
 
-    def __init__(self, series_id, apiKey, pin ):
+    def __init__(self, series_id, apiKey, pin, client=None, cache=None, workers=WORKERS ):
         '''
         Constructor
         
         series_id is the value from theTVDB.com
+        
+            client
+                default None
+                anything with get_series_extended() and get_season_extended(),
+                like tvdb_v4_official.TVDB, which is what's used if this is 
+                None.  It's only made (and logged in) if we actually have to 
+                ask for something, and then shared with every other show 
+                using the same API key.
+            cache
+                default None
+                a lib.TVDBCache.  If there is one, the series and each 
+                season are looked for there first, and kept there.
+            workers
+                default WORKERS
+                how many seasons may be fetched at the same time
         '''
-        db = tvdb_v4_official.TVDB( apiKey, pin )
+        self.apiKey = apiKey
+        self.pin = pin
+        self.client = client
+        self.cache = cache
         
         seasons = { AIRED: {}, ABSOLUTE: {}, DVD: {}, ALTERNATE: {} }
         
+        self.titles = {}
+        self.options = {}
+        self.absolute = {}
+        
         try:        
-            show = db.get_series_extended( series_id )
+            show = self.lookup( 'series', series_id, self.fetchSeries )
         except:
             self.name = False
         else:
             self.name = show['name']
             
-            for seasonData in show['seasons']:
+            # one round trip per season adds up, so they're fetched side by side
+            
+            pool = ThreadPoolExecutor( max_workers=max( 1, min( workers, len( show['seasons'] ) ) ) )
+            try:
+                seasonDetails = list( pool.map( lambda s: self.lookup( 'season', s['id'], self.fetchSeason ), show['seasons'] ) )
+            finally:
+                pool.shutdown()
+            
+            for seasonData, rawEpisodeData in zip( show['seasons'], seasonDetails ):
                 
                 seasons[ seasonData['type']['id'] ][seasonData['number']] = {}
                 
-                rawEpisodeData = db.get_season_extended(seasonData["id"])
-                
                 for episodeData in rawEpisodeData['episodes']:
     
                     seasons[ seasonData['type']['id'] ][seasonData['number']][episodeData['number']] = episodeData['name']
                 
             self.seasons = seasons
+            self.buildIndex()
+            
+    def buildIndex(self):
+        
+        for order in ORDERTYPES:
+            for season in sorted( self.seasons[order] ):
+                for episode in sorted( self.seasons[order][season] ):
+                    
+                    title = self.seasons[order][season][episode]
+                    if title is None:
+                        # not named yet
+                        continue
+                    
+                    title = self.purify( title )
+                    
+                    self.titles[( order, season, episode )] = title
+                    self.options.setdefault( ( season, episode ), {} )[ORDERTYPES[order]] = title
+                    
+                    if order == ABSOLUTE:
+                        self.absolute[episode] = title
+                        
+        if len( self.absolute ) == 0:
+            number = 0
+            for season in sorted( self.seasons[AIRED] ):
+                if season == 0:
+                    continue
+                for episode in sorted( self.seasons[AIRED][season] ):
+                    number += 1
+                    if ( AIRED, season, episode ) in self.titles:
+                        self.absolute[number] = self.titles[( AIRED, season, episode )]
+            
+    def connect(self):
+        if self.client is None:
+            self.client = getClient( self.apiKey, self.pin )
+        return self.client
+    
+    def lookup(self, kind, recordId, fetch):
+        if self.cache is None:
+            return fetch( recordId )
+        return self.cache.fetch( kind, recordId, lambda: fetch( recordId ) )
+    
+    def fetchSeries(self, series_id):
+        # only what we use is kept, which is a small part of what we're sent
+        show = self.connect().get_series_extended( series_id )
+        return { 'name': show['name'], 
+                 'seasons': [ { 'id': s['id'], 'number': s['number'], 'type': { 'id': s['type']['id'] } } for s in show['seasons'] ] }
+    
+    def fetchSeason(self, season_id):
+        season = self.connect().get_season_extended( season_id )
+        return { 'episodes': [ { 'number': e['number'], 'name': e['name'] } for e in season['episodes'] ] }
         
     def getEpisodeTitleOptions(self, season, episode):
         
-        season = int( season )
-        episode = int( episode )
+        # a copy, so the index can't be changed by whoever asked
+        return dict( self.options.get( ( int( season ), int( episode ) ), {} ) )
+    
+    def getManyEpisodeTitleOptions(self, episodes):
         
-        titles = {}
+        options = self.options
+        empty = {}
         
-        for order in ORDERTYPES:
-            
-            if order in self.seasons and season in self.seasons[order] and episode in self.season[order][season] :
-                titles[ ORDERTYPES[order] ] = self.purify( self.season[order][season][episode] )
-                
-        return titles
+        return [ dict( options.get( ( int( season ), int( episode ) ), empty ) ) for season, episode in episodes ]
+    
+    def getEpisodeTitle(self, order, season, episode):
+        return self.titles.get( ( order, int( season ), int( episode ) ) )
+    
+    def getAbsoluteTitle(self, number):
+        return self.absolute.get( int( number ) )
                 
     def purify(self, r):
         
-        r = re.sub( '\?', '', r )
-        r = re.sub( '\:', ' -', r )
-        r = re.sub( '\?', '', r )
-        r = re.sub( '\t', '', r )
-        
-        return r
+        return r.translate( PURIFY )
 
     def getOrderOptions(self):
         available = {}
@@ -0,0 +1,156 @@
+'''
+Created on Feb 27, 2023
+
+@author: Cather Steincamp
+'''
+
+import os
+import json
+from threading import Thread, Event, Lock
+from time import monotonic, sleep
+from lib.CrossThreaders import CrossThreadDict
+from lib.ShowLookup import TVShow, getClient
+
+HOUR = 60 * 60
+
+class BudgetedClient(object):
+    '''
+    Stands in for the TVDB client, and makes every request wait its turn 
+    in the prefetcher's budget.  The real client is only asked for (and 
+    logged in) when the first request is made.
+    '''
+    
+    def __init__(self, prefetcher, apiKey, pin):
+        self.prefetcher = prefetcher
+        self.apiKey = apiKey
+        self.pin = pin
+        
+    def get_series_extended(self, series_id):
+        self.prefetcher.spend()
+        return getClient( self.apiKey, self.pin ).get_series_extended( series_id )
+    
+    def get_season_extended(self, season_id):
+        self.prefetcher.spend()
+        return getClient( self.apiKey, self.pin ).get_season_extended( season_id )
+
+class ShowPrefetcher(object):
+    '''
+    Loads every show in shows.conf that has a TVDB id into the cache in a 
+    background thread, as soon as it's made and every interval after that,
+    so that naming episodes never has to wait on TheTVDB.
+    
+        configFile
+            the shows config.  It's read again on every pass, so shows 
+            added since are picked up.
+        cache
+            the lib.TVDBCache to fill
+        interval
+            default 6 hours
+            seconds between passes.  Records that are fresh are left 
+            alone; stale ones are fetched again.
+        rate
+            default 2
+            the most requests a second that will be made to TheTVDB,
+            however many shows there are.
+            
+    The loaded shows are kept in shows, a CrossThreadDict keyed by the 
+    show's name in the config, so that anything that wants one can have it
+    straight away:
+    
+        show( name )
+                returns the TVShow, or None if it isn't loaded (yet).
+        refresh()
+                starts a pass now, rather than waiting for the interval.
+        stop()
+                stops once the show being loaded (if any) is done.
+        
+    If a show can't be loaded, the reason is kept in failures, keyed the 
+    same way.
+    '''
+
+    def __init__(self, configFile, cache, interval=6 * HOUR, rate=2):
+        self.configFile = configFile
+        self.cache = cache
+        self.interval = interval
+        self.rate = rate
+        
+        self.shows = CrossThreadDict()
+        self.failures = CrossThreadDict()
+        
+        self.lock = Lock()
+        self.nextRequest = monotonic()
+        
+        self.running = True
+        self.wakeup = Event()
+        self.t = Thread( target=self.run, daemon=True )
+        self.t.start()
+        
+    def show(self, name):
+        return self.shows.get( name )
+    
+    def refresh(self):
+        self.wakeup.set()
+        
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+        
+    def spend(self):
+        # a request may be made every 1 / rate seconds; wait for our slot
+        with self.lock:
+            now = monotonic()
+            self.nextRequest = max( self.nextRequest, now )
+            wait = self.nextRequest - now
+            self.nextRequest += 1 / self.rate
+            
+        if wait > 0:
+            sleep( wait )
+        
+    def loadConfig(self):
+        if os.path.isfile( self.configFile ) == False:
+            return {}
+        
+        f = open( self.configFile, 'r' )
+        try:
+            config = json.load( f )
+        except json.JSONDecodeError:
+            # caught halfway through being saved; next time
+            config = {}
+        f.close()
+        
+        return config
+    
+    def run(self):
+        
+        while self.running:
+            
+            self.wakeup.clear()
+            
+            config = self.loadConfig()
+            apiKey = config.get( 'API Key', '' )
+            pin = config.get( 'PIN', '' )
+            
+            if apiKey != '':
+                client = BudgetedClient( self, apiKey, pin )
+                
+                for name in config:
+                    if self.running == False:
+                        break
+                    
+                    if type( config[name] ) != dict or 'tvdb' not in config[name]:
+                        continue
+                    
+                    try:
+                        show = TVShow( config[name]['tvdb'], apiKey, pin, client=client, cache=self.cache, workers=1 )
+                    except Exception as e:
+                        self.failures.set( name, repr( e ) )
+                        continue
+                    
+                    if show.name == False:
+                        self.failures.set( name, 'not found' )
+                        continue
+                    
+                    self.shows.set( name, show )
+                    self.failures.pop( name )
+            
+            self.wakeup.wait( self.interval )
@@ -0,0 +1,150 @@
+'''
+Created on Feb 25, 2023
+
+@author: Cather Steincamp
+'''
+
+import sqlite3
+import json
+from threading import Lock, Thread
+from time import time
+
+DAY = 24 * 60 * 60
+
+class TVDBCache(object):
+    '''
+    Keeps what TheTVDB tells us in an SQLite database, so that we don't 
+    have to ask again every time.
+    
+        filename
+            the database.  Created if it doesn't exist.  ':memory:' works too.
+        ttl
+            default 7 days
+            seconds for which a record is fresh, and is used without asking 
+        stale
+            default 90 days
+            seconds after that for which a record is stale.  It's still 
+            used, straight away, but it's fetched again in the background 
+            so it's fresh next time.  Past that, it's thrown away and 
+            fetched again, and we wait for it.
+            
+    Records are kept by kind (eg. 'series', 'season') and id:
+    
+        fetch( kind, recordId, loader )
+                returns the record, from the cache if it can.  Otherwise
+                (or in the background, if it's stale) calls loader() and 
+                keeps whatever it returns, which has to be something 
+                json.dumps() can handle.  If loader() fails and there's a
+                stale record, we make do with that.
+        forget( kind, recordId )
+                throws a record away.
+        wait()
+                waits for any background fetches to finish.
+        close()
+                waits for them, and closes the database.  After that 
+                nothing is found in the cache, and nothing is kept, so 
+                anyone still using it just goes without.
+        
+    Safe to share between threads, so one is enough for everybody.
+    '''
+
+    def __init__(self, filename, ttl=7 * DAY, stale=90 * DAY):
+        self.filename = filename
+        self.ttl = ttl
+        self.stale = stale
+        
+        self.lock = Lock()
+        self.refreshing = {}
+        
+        self.db = sqlite3.connect( filename, check_same_thread=False )
+        self.db.execute( 'CREATE TABLE IF NOT EXISTS records ( kind TEXT, id INTEGER, fetched REAL, data TEXT, PRIMARY KEY ( kind, id ) )' )
+        self.db.commit()
+        
+    def read(self, kind, recordId):
+        '''
+        returns the record and how old it is, or None and None
+        '''
+        with self.lock:
+            if self.db is None:
+                return None, None
+            row = self.db.execute( 'SELECT fetched, data FROM records WHERE kind = ? AND id = ?', ( kind, recordId ) ).fetchone()
+            
+        if row is None:
+            return None, None
+        
+        return json.loads( row[1] ), time() - row[0]
+    
+    def write(self, kind, recordId, record):
+        data = json.dumps( record, separators=(',',':') )
+        with self.lock:
+            if self.db is None:
+                return
+            self.db.execute( 'INSERT OR REPLACE INTO records ( kind, id, fetched, data ) VALUES ( ?, ?, ?, ? )', 
+                             ( kind, recordId, time(), data ) )
+            self.db.commit()
+            
+    def forget(self, kind, recordId):
+        with self.lock:
+            if self.db is None:
+                return
+            self.db.execute( 'DELETE FROM records WHERE kind = ? AND id = ?', ( kind, recordId ) )
+            self.db.commit()
+    
+    def fetch(self, kind, recordId, loader):
+        
+        record, age = self.read( kind, recordId )
+        
+        if record is not None and age < self.ttl:
+            return record
+        
+        if record is not None and age < self.ttl + self.stale:
+            self.refresh( kind, recordId, loader )
+            return record
+        
+        try:
+            fresh = loader()
+        except Exception:
+            if record is None:
+                raise
+            # better out of date than nothing at all
+            return record
+        
+        self.write( kind, recordId, fresh )
+        return fresh
+    
+    def refresh(self, kind, recordId, loader):
+        
+        with self.lock:
+            if ( kind, recordId ) in self.refreshing:
+                # someone's already on it
+                return
+            t = Thread( target=self.revalidate, args=[kind, recordId, loader], daemon=True )
+            self.refreshing[( kind, recordId )] = t
+            
+        t.start()
+        
+    def revalidate(self, kind, recordId, loader):
+        try:
+            self.write( kind, recordId, loader() )
+        except Exception:
+            # we'll try again next time it's asked for
+            pass
+        finally:
+            with self.lock:
+                del self.refreshing[( kind, recordId )]
+                
+    def wait(self):
+        while True:
+            with self.lock:
+                threads = list( self.refreshing.values() )
+            if len( threads ) == 0:
+                return
+            for t in threads:
+                t.join()
+                
+    def close(self):
+        self.wait()
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
@@ -0,0 +1,74 @@
+'''
+Created on Feb 8, 2023
+
+@author: Cather Steincamp
+'''
+
+from collections import deque
+from threading import Lock
+import os
+
+class Transcript(object):
+    '''
+    Keeps a full transcript of a process's output on disk, and only the
+    most recent lines in memory, so that a long job doesn't eat more and
+    more memory for hours on end.
+
+    The constructor takes:
+
+        filename
+            where the transcript is written as it arrives.  The file
+            is created (or emptied) straight away.
+        keep
+            default 200
+            how many of the most recent lines are kept in memory
+
+    Methods:
+
+        append( line )
+                    adds a line to the transcript.
+        lines()
+                    returns a list of the most recent lines.
+        save( filename )
+                    closes the transcript and moves it to filename.
+        discard()
+                    closes the transcript and deletes it.
+        close()
+                    closes the transcript, leaving it where it is.
+
+    Once closed, lines can still be appended, but they only go into memory.
+    '''
+
+    def __init__(self, filename, keep=200):
+        self.filename = filename
+        self.recent = deque( maxlen=keep )
+        self.lock = Lock()
+        self.file = open( filename, 'w', encoding='utf-8', errors='replace' )
+
+    def append(self, line):
+        with self.lock:
+            self.recent.append( line )
+            if self.file is not None:
+                self.file.write( line + '\n' )
+
+    def lines(self):
+        with self.lock:
+            return list( self.recent )
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def save(self, filename):
+        self.close()
+        os.replace( self.filename, filename )
+        self.filename = filename
+
+    def discard(self):
+        self.close()
+        try:
+            os.remove( self.filename )
+        except FileNotFoundError:
+            pass
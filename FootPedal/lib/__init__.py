@@ -1,3 +1,14 @@
+from lib.FrameReader import FrameReader
+from lib.Transcript import Transcript
+from lib.Manifest import Manifest
+from lib.TVDBCache import TVDBCache
+from lib.ShowPrefetcher import ShowPrefetcher
+from lib.JobStore import JobStore
+from lib.EventBus import EventBus
 from lib.Pwatch import Pwatch
+from lib.PipeSupervisor import PipeSupervisor
+from lib.Awatch import Awatch, AsyncEngine
 from lib.CrossThreaders import CrossThreadList, CrossThreadDict, CrossThreadItem
+from lib.CrossThreaders import FrozenCrossThreadList, FrozenCrossThreadDict, FrozenCrossThreadItem
+from lib.InboxWatcher import InboxWatcher
 from lib.ScreenWrapper import ScreenWrapper
\ No newline at end of file